@@ -0,0 +1,91 @@
+"""
+Flood output from N terminals at once, with one consumer thread per terminal,
+and report aggregate throughput plus the p50/p99 time spent in read_output.
+With per-terminal locks the read latency should stay flat as N grows instead
+of serialising every terminal behind one manager-wide lock.
+
+    python benchmarks/bench_contention.py [--terminals 1 4 16 64] [--size-mb 64]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from shell_matrix import PTYManager
+
+MB = 1024 * 1024
+MARKER = b"__DONE__"
+
+
+def consume(manager, terminal_id, sub, interval, results):
+    received = 0
+    timings = []
+    tail = b""
+    while True:
+        time.sleep(interval)
+        start = time.perf_counter()
+        data = manager.read_output(terminal_id, sub)
+        timings.append(time.perf_counter() - start)
+        received += len(data)
+        tail = (tail + data[-64:])[-64:]
+        if MARKER in tail:
+            break
+    results.append((received, timings))
+
+
+def run(manager, count, size, interval):
+    terminals = []
+    for i in range(count):
+        terminal_id = manager.create_pty(f"bench-{i}", shell="sh")
+        sub = manager.subscribe(terminal_id)
+        manager.write_command(terminal_id, "stty -echo\n")
+        terminals.append((terminal_id, sub))
+    time.sleep(0.5 + count * 0.01)
+    for terminal_id, sub in terminals:
+        manager.read_output(terminal_id, sub)
+
+    results = []
+    threads = [threading.Thread(target=consume, args=(manager, terminal_id, sub, interval, results))
+               for terminal_id, sub in terminals]
+    start = time.monotonic()
+    for terminal_id, _ in terminals:
+        manager.write_command(terminal_id, f"head -c {size} /dev/zero; printf '__%s__' DONE\n")
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    for terminal_id, _ in terminals:
+        manager.kill_terminal(terminal_id)
+
+    received = sum(r for r, _ in results)
+    timings = sorted(t for _, ts in results for t in ts)
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+    return received / MB / elapsed, p50, p99, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terminals", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--size-mb", type=int, default=64, help="output per terminal")
+    parser.add_argument("--interval", type=float, default=0.01,
+                        help="seconds between consumer drains")
+    args = parser.parse_args()
+
+    manager = PTYManager()
+    print(f"{'terminals':>9} {'seconds':>9} {'total MB/s':>11} "
+          f"{'read p50 ms':>12} {'read p99 ms':>12}")
+    for count in args.terminals:
+        mbps, p50, p99, elapsed = run(manager, count, args.size_mb * MB, args.interval)
+        print(f"{count:>9} {elapsed:>9.2f} {mbps:>11.1f} {p50:>12.3f} {p99:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
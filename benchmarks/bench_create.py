@@ -0,0 +1,58 @@
+"""
+Create terminals one after another and report p50/p99 latency of create_pty
+and of time-to-first-output (the shell's prompt reaching the scrollback log).
+Run with --pool 0 to measure cold spawning.
+
+    python benchmarks/bench_create.py [--count 100] [--shell bash] [--pool 2] [--pause 0.05]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import shell_matrix
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--shell", default="bash")
+    parser.add_argument("--pool", type=int, default=shell_matrix.SHELL_POOL_SIZE)
+    parser.add_argument("--pause", type=float, default=0.05,
+                        help="seconds between creations (lets the pool top up)")
+    args = parser.parse_args()
+
+    shell_matrix.SHELL_POOL_SIZE = args.pool
+    manager = shell_matrix.PTYManager()
+    manager.warm_pool(args.shell)
+    time.sleep(1.0)
+
+    create, first_output = [], []
+    for i in range(args.count):
+        start = time.perf_counter()
+        terminal_id = manager.create_pty(f"bench-{i}", shell=args.shell)
+        create.append(time.perf_counter() - start)
+        log = manager.get_scrollback(terminal_id)
+        while log.end == 0 and time.perf_counter() - start < 5:
+            time.sleep(0.0005)
+        first_output.append(time.perf_counter() - start)
+        manager.kill_terminal(terminal_id)
+        time.sleep(args.pause)
+
+    print(f"{args.count} x {args.shell}, pool size {args.pool}")
+    print(f"{'':>16} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'create_pty':>16} {percentile(create, 0.5):>8.2f} {percentile(create, 0.99):>8.2f}")
+    print(f"{'first output':>16} {percentile(first_output, 0.5):>8.2f} "
+          f"{percentile(first_output, 0.99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
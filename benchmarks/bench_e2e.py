@@ -0,0 +1,251 @@
+"""
+End-to-end benchmark of the real app: starts shell_matrix.py on a local
+port and drives it headless over HTTP and WebSockets, measuring
+
+  - terminal creation latency (POST /api/terminals)
+  - keystroke round-trip latency (one byte in, its echo out)
+  - sustained output throughput of a single terminal
+  - aggregate output throughput with 1/10/100/500 terminals flooding at once
+  - memory per idle terminal (server and shell) and server CPU while they sit idle
+
+Results are written as JSON so two versions can be compared:
+
+    python benchmarks/bench_e2e.py --output before.json
+    python benchmarks/bench_e2e.py --output after.json [--server-args=--daemon]
+
+With --daemon the server memory and CPU figures cover the web server only;
+the PTY daemon it starts keeps running afterwards.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shlex
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+
+SERVER = os.path.join(os.path.dirname(__file__), "..", "shell_matrix.py")
+MB = 1024 * 1024
+MARKER = b"__DONE__"
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 3)
+
+
+def request(base, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read())
+
+
+def wait_ready(base, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(base + "/debug").read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def rss(pid):
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class Bench:
+    def __init__(self, port, shell):
+        self.port = port
+        self.shell = shell
+        self.base = f"http://127.0.0.1:{port}"
+
+    def create(self, count):
+        ids, timings = [], []
+        for i in range(count):
+            start = time.perf_counter()
+            body = {"name": f"bench-{i}", "shell": self.shell}
+            ids.append(request(self.base, "POST", "/api/terminals", body)["id"])
+            timings.append(time.perf_counter() - start)
+        return ids, timings
+
+    def kill(self, ids):
+        for terminal_id in ids:
+            request(self.base, "DELETE", f"/api/terminals/{terminal_id}")
+
+    def connect(self, terminal_id):
+        return websockets.connect(f"ws://127.0.0.1:{self.port}/ws/{terminal_id}?mode=binary&flow=1",
+                                  max_size=None, compression=None)
+
+    async def keystrokes(self, terminal_id, count, interval):
+        timings = []
+        async with self.connect(terminal_id) as ws:
+            await ws.recv()
+            await asyncio.sleep(0.5)
+            while True:
+                try:
+                    await asyncio.wait_for(ws.recv(), 0.2)
+                except asyncio.TimeoutError:
+                    break
+            for i in range(count):
+                # ^U clears the line every so often so the shell never sees a long command
+                key = b"\x15" if i % 64 == 63 else b"x"
+                start = time.perf_counter()
+                await ws.send(key)
+                while True:
+                    data = await ws.recv()
+                    if isinstance(data, bytes):
+                        break
+                if key == b"x":
+                    timings.append(time.perf_counter() - start)
+                await asyncio.sleep(interval)
+            await ws.send(b"\x15")
+        return timings
+
+    async def flood(self, terminal_id, size):
+        async with self.connect(terminal_id) as ws:
+            await ws.recv()
+            await ws.send(f"stty -echo; head -c {size} /dev/zero; printf '__%s__' DONE\n".encode())
+            received, acked, tail = 0, 0, b""
+            while True:
+                data = await ws.recv()
+                if isinstance(data, str):
+                    continue
+                received += len(data)
+                if received - acked >= 256 * 1024:
+                    acked = received
+                    await ws.send(json.dumps({"type": "ack", "bytes": received}))
+                tail = (tail + data[-64:])[-64:]
+                if MARKER in tail:
+                    return received
+
+    async def flood_all(self, ids, size):
+        start = time.monotonic()
+        received = await asyncio.gather(*(self.flood(terminal_id, size) for terminal_id in ids))
+        return sum(received), time.monotonic() - start
+
+
+def run(args, server):
+    bench = Bench(args.port, args.shell)
+    results = {}
+
+    before = rss(server.pid)
+    ids, _ = bench.create(args.idle_count)
+    time.sleep(args.settle)
+    after = rss(server.pid)
+    shells = [rss(terminal["pid"]) for terminal in request(bench.base, "GET", "/api/terminals")
+              if terminal["id"] in ids]
+    cpu = cpu_seconds(server.pid)
+    time.sleep(args.idle_seconds)
+    cpu = cpu_seconds(server.pid) - cpu
+    results["idle"] = {"terminals": args.idle_count,
+                       "server_kb_per_terminal":
+                           round((after - before) / 1024 / args.idle_count, 1),
+                       "shell_kb_per_terminal": round(sum(shells) / 1024 / len(shells), 1),
+                       "server_cpu_percent": round(100.0 * cpu / args.idle_seconds, 3)}
+    bench.kill(ids)
+    time.sleep(args.settle)
+
+    ids, timings = bench.create(args.create_count)
+    results["create_ms"] = {"count": len(timings), "p50": percentile(timings, 0.5),
+                            "p99": percentile(timings, 0.99)}
+    bench.kill(ids)
+    time.sleep(args.settle)
+
+    ids, _ = bench.create(1)
+    time.sleep(args.settle)
+    timings = asyncio.run(bench.keystrokes(ids[0], args.keystrokes, args.key_interval))
+    results["keystroke_rtt_ms"] = {"count": len(timings), "p50": percentile(timings, 0.5),
+                                   "p99": percentile(timings, 0.99)}
+    received, elapsed = asyncio.run(bench.flood_all(ids, args.size_mb * MB))
+    results["throughput_mb_s"] = round(received / MB / elapsed, 2)
+    bench.kill(ids)
+
+    results["aggregate"] = []
+    for count in args.terminals:
+        ids, _ = bench.create(count)
+        time.sleep(args.settle)
+        size = max(MB, args.aggregate_mb * MB // count)
+        received, elapsed = asyncio.run(bench.flood_all(ids, size))
+        results["aggregate"].append({"terminals": count, "mb_per_terminal": round(size / MB, 2),
+                                     "seconds": round(elapsed, 3),
+                                     "total_mb_s": round(received / MB / elapsed, 2)})
+        bench.kill(ids)
+        time.sleep(args.settle)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--shell", default="sh")
+    parser.add_argument("--server-args", default="",
+                        help="extra arguments for shell_matrix.py, e.g. --daemon")
+    parser.add_argument("--create-count", type=int, default=50)
+    parser.add_argument("--keystrokes", type=int, default=500)
+    parser.add_argument("--key-interval", type=float, default=0.05,
+                        help="seconds between keystrokes")
+    parser.add_argument("--size-mb", type=int, default=64,
+                        help="output of the single-terminal flood")
+    parser.add_argument("--terminals", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--aggregate-mb", type=int, default=128,
+                        help="total output per aggregate round")
+    parser.add_argument("--idle-count", type=int, default=100)
+    parser.add_argument("--idle-seconds", type=float, default=10.0)
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds to let shells start between phases")
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    server = subprocess.Popen([sys.executable, SERVER, "--port", str(args.port),
+                               *shlex.split(args.server_args)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(f"http://127.0.0.1:{args.port}")
+        time.sleep(args.settle)
+        results = run(args, server)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        "version": subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                                  text=True, cwd=os.path.dirname(SERVER)).stdout.strip(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "shell": args.shell,
+        "server_args": args.server_args,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Idle cost of the PTY I/O engine: CPU% and context switches of the server
+process while N shells sit at their prompt.
+
+    python benchmarks/bench_idle.py [--counts 10 100 500] [--seconds 5]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from shell_matrix import PTYManager
+
+
+def measure(manager, count, seconds, shell):
+    ids = [manager.create_pty(f"bench-{i}", shell=shell) for i in range(count)]
+    time.sleep(1.0)
+
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.monotonic()
+    time.sleep(seconds)
+    elapsed = time.monotonic() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    switches = (after.ru_nvcsw - before.ru_nvcsw) + (after.ru_nivcsw - before.ru_nivcsw)
+    threads = threading.active_count()
+
+    for terminal_id in ids:
+        manager.kill_terminal(terminal_id)
+    return {
+        "terminals": count,
+        "threads": threads,
+        "cpu_percent": round(100.0 * cpu / elapsed, 3),
+        "ctx_switches_per_s": round(switches / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--shell", default="sh")
+    args = parser.parse_args()
+
+    manager = PTYManager()
+    print(f"{'terminals':>10} {'threads':>8} {'cpu%':>8} {'ctxsw/s':>10}")
+    for count in args.counts:
+        r = measure(manager, count, args.seconds, args.shell)
+        print(f"{r['terminals']:>10} {r['threads']:>8} {r['cpu_percent']:>8} "
+              f"{r['ctx_switches_per_s']:>10}")
+
+
+if __name__ == "__main__":
+    main()
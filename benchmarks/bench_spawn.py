@@ -0,0 +1,58 @@
+"""
+Measure shell spawn latency as the server process grows, comparing
+os.fork() with os.posix_spawn(). The server's resident memory is inflated
+with touched ballast before each round; fork cost grows with it while
+posix_spawn stays flat.
+
+    python benchmarks/bench_spawn.py [--ballast-mb 0 512 2048] [--count 50] [--shell sh]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import shell_matrix
+
+MB = 1024 * 1024
+
+
+def measure(manager, shell, count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        term = manager._spawn(shell)
+        timings.append(time.perf_counter() - start)
+        with manager.lock:
+            manager.terminals[term.id] = term
+        manager.kill_terminal(term.id)
+    timings.sort()
+    return statistics.median(timings) * 1000, timings[min(count - 1, int(count * 0.99))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ballast-mb", type=int, nargs="+", default=[0, 512, 2048])
+    parser.add_argument("--count", type=int, default=50)
+    parser.add_argument("--shell", default="sh")
+    args = parser.parse_args()
+
+    shell_matrix.SHELL_POOL_SIZE = 0
+    manager = shell_matrix.PTYManager()
+    methods = ["fork"] + (["posix_spawn"] if hasattr(os, "posix_spawnp") else [])
+    print(f"{'ballast MB':>10} " + " ".join(f"{m + ' p50':>16} {m + ' p99':>16}" for m in methods))
+    for size in args.ballast_mb:
+        ballast = b"\x01" * (size * MB)
+        row = []
+        for method in methods:
+            shell_matrix.SPAWN_METHOD = method
+            row.extend(measure(manager, args.shell, args.count))
+        print(f"{size:>10} " + " ".join(f"{value:>16.2f}" for value in row))
+        del ballast
+
+
+if __name__ == "__main__":
+    main()
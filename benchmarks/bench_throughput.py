@@ -0,0 +1,62 @@
+"""
+Push a large volume of output through one PTY while the consumer lags and
+report the time taken for every segment. With chunked buffers each segment
+should take roughly the same time (linear total time).
+
+    python benchmarks/bench_throughput.py [--size-mb 1024] [--segment-mb 64] [--interval 0.05]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from shell_matrix import PTYManager
+
+MB = 1024 * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--segment-mb", type=int, default=64)
+    parser.add_argument("--interval", type=float, default=0.01,
+                        help="seconds between consumer drains (simulates a lagging client)")
+    args = parser.parse_args()
+
+    manager = PTYManager()
+    terminal_id = manager.create_pty("bench", shell="sh")
+    sub = manager.subscribe(terminal_id)
+    manager.write_command(terminal_id, "stty -echo\n")
+    time.sleep(0.5)
+    manager.read_output_text(terminal_id, sub)
+
+    total = args.size_mb * MB
+    manager.write_command(terminal_id, f"head -c {total} /dev/zero; printf '__%s__' DONE\n")
+
+    received = 0
+    next_mark = args.segment_mb * MB
+    start = last = time.monotonic()
+    print(f"{'MB':>8} {'seconds':>9} {'segment MB/s':>13}")
+    while True:
+        time.sleep(args.interval)
+        output = manager.read_output_text(terminal_id, sub)
+        received += len(output)
+        while received >= next_mark and next_mark <= total:
+            now = time.monotonic()
+            rate = args.segment_mb / (now - last)
+            print(f"{next_mark // MB:>8} {now - start:>9.2f} {rate:>13.1f}")
+            last = now
+            next_mark += args.segment_mb * MB
+        if "__DONE__" in output:
+            break
+
+    elapsed = time.monotonic() - start
+    print(f"total {received / MB:.0f} MB in {elapsed:.2f}s ({received / MB / elapsed:.1f} MB/s)")
+    manager.kill_terminal(terminal_id)
+
+
+if __name__ == "__main__":
+    main()
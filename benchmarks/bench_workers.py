@@ -0,0 +1,102 @@
+"""
+Start shell_matrix.py with 1..N worker processes behind the terminal router
+and flood output from several terminals at once over WebSockets, reporting
+aggregate throughput per worker count. Throughput should scale with workers
+up to the number of cores.
+
+    python benchmarks/bench_workers.py [--workers 1 2 4] [--terminals 8] [--size-mb 64]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+
+SERVER = os.path.join(os.path.dirname(__file__), "..", "shell_matrix.py")
+MB = 1024 * 1024
+MARKER = b"__DONE__"
+
+
+def post(base, path, body):
+    request = urllib.request.Request(base + path, data=json.dumps(body).encode(), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def wait_ready(base, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(base + "/debug").read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def flood(port, terminal_id, size):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws/{terminal_id}?mode=binary&flow=1",
+                                  max_size=None, compression=None) as ws:
+        await ws.recv()
+        await ws.send(f"stty -echo; head -c {size} /dev/zero; printf '__%s__' DONE\n".encode())
+        received, acked, tail = 0, 0, b""
+        while True:
+            data = await ws.recv()
+            if isinstance(data, str):
+                continue
+            received += len(data)
+            if received - acked >= 256 * 1024:
+                acked = received
+                await ws.send(json.dumps({"type": "ack", "bytes": received}))
+            tail = (tail + data[-64:])[-64:]
+            if MARKER in tail:
+                return received
+
+
+async def run_clients(port, terminal_ids, size):
+    start = time.monotonic()
+    received = await asyncio.gather(*(flood(port, terminal_id, size)
+                                      for terminal_id in terminal_ids))
+    return sum(received), time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--terminals", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=64, help="output per terminal")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--settle", type=float, default=10.0,
+                        help="seconds to wait after startup while workers warm their shell pools")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPU(s), {args.terminals} terminals x {args.size_mb} MB")
+    print(f"{'workers':>7} {'seconds':>9} {'total MB/s':>11}")
+    for count in args.workers:
+        server = subprocess.Popen([sys.executable, SERVER, "--workers", str(count),
+                                   "--port", str(args.port)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        base = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_ready(base)
+            time.sleep(args.settle)
+            terminal_ids = [post(base, "/api/terminals",
+                                 {"name": f"bench-{i}", "shell": "sh"})["id"]
+                            for i in range(args.terminals)]
+            time.sleep(0.5)
+            received, elapsed = asyncio.run(run_clients(args.port, terminal_ids, args.size_mb * MB))
+            print(f"{count:>7} {elapsed:>9.2f} {received / MB / elapsed:>11.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
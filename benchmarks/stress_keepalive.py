@@ -0,0 +1,68 @@
+"""
+Terminals that a dashboard holds without a socket (placeholders and suspended
+tabs) must outlive DETACH_GRACE_PERIOD as long as the tab sends keepalives,
+while terminals nobody holds are still reaped. Runs with a short grace period.
+
+    python benchmarks/stress_keepalive.py [--terminals 10] [--grace 2]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import shell_matrix
+from fastapi.testclient import TestClient
+
+
+def detach(client, terminal_id):
+    # The terminal was shown once (e.g. before a reload), then left without a socket
+    with client.websocket_connect(f"/ws/{terminal_id}?mode=binary") as ws:
+        ws.receive_text()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--terminals", type=int, default=10)
+    parser.add_argument("--grace", type=float, default=2.0)
+    parser.add_argument("--shell", default="sh")
+    args = parser.parse_args()
+
+    shell_matrix.DETACH_GRACE_PERIOD = args.grace
+    with TestClient(shell_matrix.app) as client:
+        ids = [client.post("/api/terminals", json={"name": f"keepalive-{i}",
+                                                   "shell": args.shell}).json()["id"]
+               for i in range(2 * args.terminals)]
+        held, dropped = ids[:args.terminals], ids[args.terminals:]
+        for terminal_id in ids:
+            detach(client, terminal_id)
+
+        latencies = []
+        deadline = time.monotonic() + 3 * args.grace
+        while time.monotonic() < deadline:
+            for terminal_id in held:
+                start = time.perf_counter()
+                client.post(f"/api/terminals/{terminal_id}/keepalive")
+                latencies.append(time.perf_counter() - start)
+            time.sleep(args.grace / 4)
+        time.sleep(0.5)
+
+        alive = {t["id"] for t in client.get("/api/terminals").json()}
+        kept = sum(terminal_id in alive for terminal_id in held)
+        reaped = sum(terminal_id not in alive for terminal_id in dropped)
+        for terminal_id in alive & set(ids):
+            client.delete(f"/api/terminals/{terminal_id}")
+
+    latencies.sort()
+    print(f"held terminals kept:     {kept}/{len(held)}")
+    print(f"unheld terminals reaped: {reaped}/{len(dropped)}")
+    print(f"keepalive p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"max {latencies[-1] * 1000:.2f} ms over {len(latencies)} requests")
+    if kept != len(held) or reaped != len(dropped):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
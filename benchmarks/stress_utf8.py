@@ -0,0 +1,70 @@
+"""
+Stream random CJK / emoji text through a PTY while draining output at
+random moments, and check that every character arrives intact (no U+FFFD
+from multibyte sequences split across reads).
+
+    python benchmarks/stress_utf8.py [--chars 2000000] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from shell_matrix import PTYManager
+
+RANGES = [
+    (0x4E00, 0x9FFF),    # CJK unified ideographs (3 bytes)
+    (0xAC00, 0xD7A3),    # Hangul syllables (3 bytes)
+    (0x1F300, 0x1F5FF),  # pictographs (4 bytes)
+    (0x1F600, 0x1F64F),  # emoticons (4 bytes)
+    (0x00C0, 0x00FF),    # latin-1 letters (2 bytes)
+    (0x0041, 0x005A),    # ASCII
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chars", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    text = "".join(chr(rng.randint(*rng.choice(RANGES))) for _ in range(args.chars))
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False) as f:
+        f.write(text)
+        path = f.name
+
+    manager = PTYManager()
+    terminal_id = manager.create_pty("stress", shell="sh")
+    sub = manager.subscribe(terminal_id)
+    manager.write_command(terminal_id, "stty -echo\n")
+    time.sleep(0.5)
+    manager.read_output_text(terminal_id, sub)
+
+    manager.write_command(terminal_id, f"cat {path}; printf '__%s__' DONE\n")
+    parts = []
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        time.sleep(rng.random() * 0.0005)
+        parts.append(manager.read_output_text(terminal_id, sub))
+        if "__DONE__" in parts[-1] or "__DONE__" in "".join(parts[-2:]):
+            break
+    manager.kill_terminal(terminal_id)
+    os.unlink(path)
+
+    received = "".join(parts)
+    received = received[:received.find("__DONE__")]
+    replacements = received.count("�")
+    ok = received.endswith(text) and replacements == 0
+    print(f"chars={len(text)} drains={len(parts)} replacements={replacements} "
+          f"{'OK' if ok else 'FAIL'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,12 @@ echo "[+] pip found - OK"
 echo "[*] Installing Python dependencies..."
 pip3 install -r requirements.txt
 
+# Vendor xterm.js so the dashboard works without reaching the CDN
+echo "[*] Downloading xterm.js..."
+if ! python3 shell_matrix.py --fetch-vendor; then
+    echo "[!] Could not download xterm.js; the dashboard will load it from the CDN"
+fi
+
 echo ""
 echo "[+] Installation completed successfully!"
 echo ""
@@ -2,15 +2,16 @@
 >_ SHELL MATRIX by Rondinelli Castilho - N0rd
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Request
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import asyncio
 import os
 import uuid
 import threading
-import select
+import selectors
+import collections
 import fcntl
 import termios
 import struct
@@ -20,11 +21,43 @@ import uvicorn
 import time
 import json
 import shutil
+import gzip
+import codecs
 from pathlib import Path
 from typing import Optional
 import base64
+import zlib
+import contextlib
+import queue
+import traceback
+import functools
+import hashlib
+import bisect
+import resource
+import re
+import sys
+import socket
+import argparse
+import subprocess
+import urllib.request
 
-app = FastAPI()
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    pty_manager.warm_pool(*SHELL_POOL_WARM)
+    await asyncio.to_thread(dashboard_assets)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 pty_manager = None
 
 STORAGE_DIR = Path("/tmp/kali_dashboard")
@@ -32,6 +65,68 @@ STORAGE_DIR.mkdir(exist_ok=True)
 SESSIONS_FILE = STORAGE_DIR / "sessions.json"
 UPLOADS_DIR = STORAGE_DIR / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
+LOGS_DIR = STORAGE_DIR / "logs"
+WORKERS_DIR = STORAGE_DIR / "workers"
+ASSETS_PREFIX = "/assets"
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+VENDOR_DIR = STATIC_DIR / "vendor"
+# (file, URL, sha256). A file pinned to None is fetched with a warning that prints
+# its digest, to be pinned here; a pinned file is only written if it matches.
+VENDOR_FILES = (
+    ("xterm.js", "https://cdn.jsdelivr.net/npm/xterm@5.3.0/lib/xterm.js", None),
+    ("xterm-addon-fit.js",
+     "https://cdn.jsdelivr.net/npm/xterm-addon-fit@0.8.0/lib/xterm-addon-fit.js", None),
+    ("xterm-addon-search.js",
+     "https://cdn.jsdelivr.net/npm/xterm-addon-search@0.13.0/lib/xterm-addon-search.js", None),
+    ("xterm.css", "https://cdn.jsdelivr.net/npm/xterm@5.3.0/css/xterm.css", None),
+)
+VENDOR_RENDERERS = (
+    ("webgl", "xterm-addon-webgl.js",
+     "https://cdn.jsdelivr.net/npm/xterm-addon-webgl@0.16.0/lib/xterm-addon-webgl.js", None),
+    ("canvas", "xterm-addon-canvas.js",
+     "https://cdn.jsdelivr.net/npm/xterm-addon-canvas@0.5.0/lib/xterm-addon-canvas.js", None),
+)
+
+OUTPUT_BUFFER_LIMIT = 8 * 1024 * 1024
+INPUT_BUFFER_LIMIT = 1024 * 1024
+WRITEV_MAX_CHUNKS = 64
+OUTPUT_BATCH_DELAY = 0.005
+OUTPUT_BATCH_MAX_BYTES = 256 * 1024
+OUTPUT_ECHO_BYTES = 512
+WS_PER_MESSAGE_DEFLATE = True
+COMPRESS_MIN_BYTES = 1024
+OUTPUT_HIGH_WATER = 1024 * 1024
+OUTPUT_LOW_WATER = 256 * 1024
+FLOW_WINDOW_BYTES = 1024 * 1024
+DETACH_GRACE_PERIOD = 15 * 60
+KILL_TIMEOUT = 5.0
+SHELL_POOL_SIZE = 2
+SHELL_POOL_WARM = ("bash",)
+SHELLS = ("bash", "zsh", "fish", "sh")
+SPAWN_METHOD = "posix_spawn" if hasattr(os, "posix_spawnp") else "fork"
+REAP_POLL_INTERVAL = 1.0
+COMPRESS_LEVEL = 3
+FRAME_RAW = 0
+FRAME_DEFLATE = 1
+FRAME_ZSTD = 2
+LOG_MEMORY_LIMIT = 4 * 1024 * 1024
+LOG_SEGMENT_SIZE = 1024 * 1024
+LOG_DISK_LIMIT = 256 * 1024 * 1024
+LOG_SPILL_RETRY = 5.0
+ROUTER_CHUNK_SIZE = 256 * 1024
+WS_SEND_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+CREATE_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PTY_DAEMON_SOCKET = STORAGE_DIR / "ptyd.sock"
+PTY_DAEMON_CALL_TIMEOUT = 10.0
+PTY_DAEMON_STATS_INTERVAL = 0.5
+MSG_CALL = 1
+MSG_REPLY = 2
+MSG_OUTPUT = 3
+MSG_INPUT = 4
+MSG_ACK = 5
+MSG_EXIT = 6
+MSG_LOG = 7
+WORKER_START_TIMEOUT = 15.0
 
 class TerminalCreate(BaseModel):
     name: str = "Terminal"
@@ -39,18 +134,544 @@ class TerminalCreate(BaseModel):
     tab_type: str = "terminal"
     shell: str = "bash"
 
+class ChunkBuffer:
+    def __init__(self, max_bytes=None, drop_oldest=True):
+        self.chunks = collections.deque()
+        self.size = 0
+        self.max_bytes = max_bytes
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+    
+    def __len__(self):
+        return self.size
+    
+    def append(self, data):
+        if not data:
+            return True
+        if (self.max_bytes is not None and not self.drop_oldest
+                and self.size + len(data) > self.max_bytes):
+            return False
+        self.chunks.append(data)
+        self.size += len(data)
+        if self.max_bytes is not None:
+            while self.size > self.max_bytes and len(self.chunks) > 1:
+                old = self.chunks.popleft()
+                self.size -= len(old)
+                self.dropped += len(old)
+        return True
+    
+    def drain(self, limit=None):
+        if not self.chunks:
+            return b""
+        if limit is not None and limit < self.size:
+            chunks = []
+            taken = 0
+            while taken < limit:
+                chunk = self.chunks.popleft()
+                if taken + len(chunk) > limit:
+                    cut = limit - taken
+                    self.chunks.appendleft(memoryview(chunk)[cut:])
+                    chunk = memoryview(chunk)[:cut]
+                chunks.append(chunk)
+                taken += len(chunk)
+            self.size -= taken
+            return b"".join(chunks)
+        data = self.chunks[0] if len(self.chunks) == 1 else b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return bytes(data)
+    
+    def head(self, count=WRITEV_MAX_CHUNKS):
+        return [self.chunks[i] for i in range(min(count, len(self.chunks)))]
+    
+    def consume(self, count):
+        while count and self.chunks:
+            chunk = self.chunks[0]
+            if len(chunk) <= count:
+                self.chunks.popleft()
+                self.size -= len(chunk)
+                count -= len(chunk)
+            else:
+                self.chunks[0] = memoryview(chunk)[count:]
+                self.size -= count
+                count = 0
+    
+    def clear(self):
+        self.chunks.clear()
+        self.size = 0
+
+class OutputSubscriber:
+    __slots__ = ("cursor", "watch", "notify", "decoder")
+    
+    def __init__(self, cursor, watch=False, notify=None):
+        self.cursor = cursor
+        self.watch = watch
+        self.notify = notify
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+class OutputRing:
+    def __init__(self, max_bytes=OUTPUT_BUFFER_LIMIT):
+        self.chunks = collections.deque()
+        self.start = 0
+        self.end = 0
+        self.max_bytes = max_bytes
+        self.subscribers = set()
+        self._frame = None
+    
+    def __len__(self):
+        return self.end - self.start
+    
+    def append(self, data):
+        self.chunks.append((self.end, data))
+        self.end += len(data)
+        self.trim()
+    
+    def backlog(self):
+        cursors = [sub.cursor for sub in self.subscribers if not sub.watch]
+        return self.end - min(cursors) if cursors else 0
+    
+    def trim(self):
+        floor = min((sub.cursor for sub in self.subscribers), default=self.end)
+        floor = max(floor, self.end - self.max_bytes)
+        while self.chunks and self.chunks[0][0] + len(self.chunks[0][1]) <= floor:
+            offset, chunk = self.chunks.popleft()
+            self.start = offset + len(chunk)
+        if not self.chunks:
+            self.start = self.end
+    
+    def read(self, sub, limit=None):
+        cursor = sub.cursor
+        if cursor < self.start:
+            return None
+        stop = self.end if limit is None else min(self.end, cursor + limit)
+        if stop <= cursor:
+            return b""
+        if self._frame and self._frame[0] == cursor and self._frame[1] == stop:
+            data = self._frame[2]
+        else:
+            parts = []
+            for offset, chunk in self.chunks:
+                if offset + len(chunk) <= cursor:
+                    continue
+                if offset >= stop:
+                    break
+                parts.append(chunk[max(cursor - offset, 0):stop - offset])
+            data = parts[0] if len(parts) == 1 else b"".join(parts)
+            self._frame = (cursor, stop, data)
+        sub.cursor = stop
+        self.trim()
+        return data
+
+class LogSpiller:
+    """Writes ScrollbackLog segments to disk on a background thread."""
+    
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.lock = threading.Lock()
+    
+    def submit(self, log):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self.thread.start()
+        self.queue.put(log)
+    
+    def _run(self):
+        while True:
+            log = self.queue.get()
+            try:
+                while log._spill():
+                    pass
+            except Exception:
+                traceback.print_exc()
+            finally:
+                log._spill_queued = False
+
+log_spiller = LogSpiller()
+
+class ScrollbackLog:
+    def __init__(self, directory, memory_limit=LOG_MEMORY_LIMIT,
+                 segment_size=LOG_SEGMENT_SIZE, disk_limit=LOG_DISK_LIMIT, spiller=log_spiller):
+        self.directory = Path(directory)
+        self.memory_limit = memory_limit
+        self.segment_size = segment_size
+        self.disk_limit = disk_limit
+        self.lock = threading.Lock()
+        self.memory = collections.deque()
+        self.memory_size = 0
+        self.segments = collections.deque()
+        self.disk_size = 0
+        self.end = 0
+        self.closed = False
+        self.dropped = 0
+        self.spiller = spiller
+        self._segment_seq = 0
+        self._spill_queued = False
+        self._retry_at = 0.0
+    
+    @property
+    def start(self):
+        if self.segments:
+            return self.segments[0][1]
+        return self.end - self.memory_size
+    
+    def append(self, data):
+        with self.lock:
+            if self.closed:
+                return
+            self.memory.append(data)
+            self.memory_size += len(data)
+            self.end += len(data)
+            if self.memory_size <= self.memory_limit or self._spill_queued:
+                return
+            if time.monotonic() < self._retry_at:
+                if self.memory_size > 2 * self.memory_limit:
+                    self._drop_oldest()
+                return
+            self._spill_queued = True
+        self.spiller.submit(self)
+    
+    def _spill(self):
+        # Chunks stay in memory (and visible to readers) until their segment
+        # is on disk; only append() adds to the deque, at the other end
+        with self.lock:
+            if self.closed or self.memory_size <= self.memory_limit:
+                return False
+            chunks = []
+            size = 0
+            for chunk in self.memory:
+                if size >= self.segment_size:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+            offset = self.end - self.memory_size
+            self._segment_seq += 1
+            path = self.directory / f"{self._segment_seq:08d}.gz"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with gzip.open(path, "wb", compresslevel=1) as f:
+                f.write(b"".join(chunks))
+        except OSError as e:
+            print(f"Scrollback spill to {path} failed: {e}")
+            with contextlib.suppress(OSError):
+                path.unlink()
+            with self.lock:
+                self._retry_at = time.monotonic() + LOG_SPILL_RETRY
+                if self.memory_size > 2 * self.memory_limit:
+                    self._drop_oldest()
+            return False
+        
+        with self.lock:
+            if self.closed:
+                with contextlib.suppress(OSError):
+                    path.unlink()
+                return False
+            for _ in chunks:
+                self.memory.popleft()
+            self.memory_size -= size
+            self.segments.append((path, offset, size))
+            self.disk_size += size
+            while self.disk_size > self.disk_limit and self.segments:
+                old_path, _, old_size = self.segments.popleft()
+                self.disk_size -= old_size
+                with contextlib.suppress(OSError):
+                    old_path.unlink()
+        return True
+    
+    def _drop_oldest(self):
+        # Disk is failing and memory is at twice its limit: discard the oldest
+        # output. Segments on disk would leave a gap before memory, so they go too.
+        for path, _, _ in self.segments:
+            with contextlib.suppress(OSError):
+                path.unlink()
+        self.segments.clear()
+        self.disk_size = 0
+        while self.memory_size > self.memory_limit:
+            chunk = self.memory.popleft()
+            self.memory_size -= len(chunk)
+            self.dropped += len(chunk)
+    
+    def snapshot(self, start=0):
+        # Segments ending after `start` are opened under the lock, so a rotation that
+        # unlinks them later cannot cut a read short; release() closes them
+        with self.lock:
+            segments = [(open(path, "rb"), seg_start, seg_len)
+                        for path, seg_start, seg_len in self.segments
+                        if seg_start + seg_len > start]
+            return segments, list(self.memory), self.end - self.memory_size, self.end
+    
+    def release(self, snapshot):
+        for f, _, _ in snapshot[0]:
+            f.close()
+    
+    def iter_range(self, snapshot, start, end, chunk_size=65536):
+        segments, memory, memory_start, _ = snapshot
+        for f, seg_start, seg_len in segments:
+            if seg_start + seg_len <= start:
+                continue
+            if seg_start >= end:
+                return
+            f.seek(0)
+            with gzip.GzipFile(fileobj=f) as gz:
+                pos = seg_start
+                if start > pos:
+                    gz.seek(start - pos)
+                    pos = start
+                while pos < min(end, seg_start + seg_len):
+                    data = gz.read(min(chunk_size, end - pos))
+                    if not data:
+                        raise EOFError(f"Scrollback segment at {seg_start} is truncated")
+                    pos += len(data)
+                    yield data
+        pos = memory_start
+        for chunk in memory:
+            chunk_end = pos + len(chunk)
+            if chunk_end > start and pos < end:
+                yield bytes(chunk[max(start - pos, 0):min(end, chunk_end) - pos])
+            pos = chunk_end
+    
+    def tail_offset(self, snapshot, lines):
+        segments, memory, memory_start, end = snapshot
+        if lines <= 0:
+            return end
+        parts = []
+        pos = memory_start
+        for chunk in memory:
+            parts.append((pos, chunk))
+            pos += len(chunk)
+        parts.reverse()
+        first = segments[0][1] if segments else memory_start
+        remaining = lines + 1
+        last_byte = parts[0][1][-1:] if parts else b""
+        if last_byte != b"\n":
+            remaining -= 1
+        seg_index = len(segments) - 1
+        while True:
+            for part_start, data in parts:
+                pos = len(data)
+                while True:
+                    pos = data.rfind(b"\n", 0, pos)
+                    if pos < 0:
+                        break
+                    remaining -= 1
+                    if remaining == 0:
+                        return part_start + pos + 1
+            if seg_index < 0:
+                return first
+            f, seg_start, _ = segments[seg_index]
+            seg_index -= 1
+            try:
+                f.seek(0)
+                with gzip.GzipFile(fileobj=f) as gz:
+                    parts = [(seg_start, gz.read())]
+            except (OSError, EOFError):
+                return seg_start + segments[seg_index + 1][2]
+    
+    def tail(self, lines):
+        snapshot = self.snapshot()
+        try:
+            return self.tail_offset(snapshot, lines)
+        finally:
+            self.release(snapshot)
+    
+    def bounds(self, snapshot):
+        segments, _, memory_start, end = snapshot
+        return (segments[0][1] if segments else memory_start), end
+    
+    def read(self, start=0, end=None):
+        snapshot = self.snapshot(start)
+        try:
+            return b"".join(self.iter_range(snapshot, start, snapshot[3] if end is None else end))
+        finally:
+            self.release(snapshot)
+    
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.memory.clear()
+            self.memory_size = 0
+            self.segments.clear()
+            self.disk_size = 0
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def render(self, name, help_text):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{le="{bound}"}} {total}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+def _metric(name, kind, help_text, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+    return lines
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def process_sample(process):
+    try:
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return [process, threading.active_count(), rss]
+
+ws_send_latency = Histogram(WS_SEND_BUCKETS)
+
+class TerminalStats:
+    __slots__ = ("read_pauses", "catch_up_bytes", "frames", "bytes_sent", "window_start",
+                 "window_frames", "window_bytes", "frames_per_s", "bytes_per_s",
+                 "compress_mode", "raw_bytes", "compressed_bytes", "compress_seconds",
+                 "bytes_read", "reads", "bytes_written", "writes", "input_dropped", "lock_wait",
+                 "backlog_high", "input_high", "paused_since", "paused_seconds")
+    
+    def __init__(self):
+        self.bytes_read = 0
+        self.reads = 0
+        self.bytes_written = 0
+        self.writes = 0
+        self.input_dropped = 0
+        self.lock_wait = 0.0
+        self.backlog_high = 0
+        self.input_high = 0
+        self.paused_since = 0.0
+        self.paused_seconds = 0.0
+        self.read_pauses = 0
+        self.catch_up_bytes = 0
+        self.frames = 0
+        self.bytes_sent = 0
+        self.window_start = time.monotonic()
+        self.window_frames = 0
+        self.window_bytes = 0
+        self.frames_per_s = 0.0
+        self.bytes_per_s = 0.0
+        self.compress_mode = None
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.compress_seconds = 0.0
+
+class Terminal:
+    __slots__ = ("id", "master_fd", "pid", "name", "workspace", "shell", "output", "input_queue",
+                 "cols", "rows", "log", "env_vars", "lock", "listeners", "read_paused", "eof",
+                 "closed", "detached_at", "stats", "pidfd", "exit_code", "kill_deadline")
+    
+    def __init__(self, terminal_id, master_fd, pid, name, workspace, shell):
+        self.id = terminal_id
+        self.master_fd = master_fd
+        self.pid = pid
+        self.name = name
+        self.workspace = workspace
+        self.shell = shell
+        self.output = OutputRing(OUTPUT_BUFFER_LIMIT)
+        self.input_queue = ChunkBuffer(INPUT_BUFFER_LIMIT, drop_oldest=False)
+        self.cols = 80
+        self.rows = 24
+        self.log = ScrollbackLog(LOGS_DIR / terminal_id)
+        self.env_vars = {}
+        self.lock = threading.Lock()
+        self.listeners = set()
+        self.read_paused = False
+        self.eof = False
+        self.closed = False
+        self.detached_at = None
+        self.stats = TerminalStats()
+        self.pidfd = None
+        self.exit_code = None
+        self.kill_deadline = None
+
 class PTYManager:
     def __init__(self):
         self.terminals = {}
         self.lock = threading.Lock()
+        self.selector = selectors.DefaultSelector()
+        self._ops = collections.deque()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self.selector.register(self._wake_r, selectors.EVENT_READ)
+        self._io_thread = None
+        self._children = {}
+        self._next_reap = 0.0
+        self._pools = {}
+        self._pool_wanted = threading.Event()
+        self._pool_thread = None
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self.create_latency = Histogram(CREATE_BUCKETS)
     
     def create_pty(self, name="Terminal", workspace="ws1", shell="bash"):
+        shell_cmd = shell if shell in SHELLS else 'bash'
+        start = time.perf_counter()
+        term = self._take_warm(shell_cmd)
+        if term:
+            self.pool_hits += 1
+        else:
+            self.pool_misses += 1
+            term = self._spawn(shell_cmd)
+        self.create_latency.observe(time.perf_counter() - start)
+        term.name = name
+        term.workspace = workspace
+        term.shell = shell
+        
+        with self.lock:
+            self.terminals[term.id] = term
+        self.warm_pool(shell_cmd)
+        return term.id
+    
+    def _spawn(self, shell_cmd):
         master_fd, slave_fd = pty.openpty()
         fcntl.ioctl(master_fd, termios.TIOCSWINSZ, struct.pack("HHHH", 24, 80, 0, 0))
         
         flags = fcntl.fcntl(master_fd, fcntl.F_GETFL)
         fcntl.fcntl(master_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
         
+        try:
+            if SPAWN_METHOD == "posix_spawn":
+                pid = self._posix_spawn(shell_cmd, slave_fd)
+            else:
+                pid = self._fork_exec(shell_cmd, master_fd, slave_fd)
+        except OSError:
+            os.close(master_fd)
+            raise
+        finally:
+            os.close(slave_fd)
+        term = Terminal(str(uuid.uuid4()), master_fd, pid, None, None, shell_cmd)
+        
+        self._start_io_loop()
+        self._submit(self._watch_child, term)
+        self._submit(self._update_interest, term)
+        return term
+    
+    def _posix_spawn(self, shell_cmd, slave_fd):
+        # setsid runs before the file actions, so opening the slave by path
+        # makes it the new session's controlling terminal
+        env = dict(os.environ, TERM='xterm-256color')
+        return os.posix_spawnp(shell_cmd, [shell_cmd], env, setsid=True, file_actions=[
+            (os.POSIX_SPAWN_OPEN, 0, os.ttyname(slave_fd), os.O_RDWR, 0),
+            (os.POSIX_SPAWN_DUP2, 0, 1),
+            (os.POSIX_SPAWN_DUP2, 0, 2),
+        ])
+    
+    def _fork_exec(self, shell_cmd, master_fd, slave_fd):
         pid = os.fork()
         if pid == 0:
             os.setsid()
@@ -61,123 +682,632 @@ class PTYManager:
             os.dup2(slave_fd, 2)
             os.close(slave_fd)
             os.environ['TERM'] = 'xterm-256color'
-            
-            shell_cmd = shell if shell in ['bash', 'zsh', 'fish', 'sh'] else 'bash'
-            os.execlp(shell_cmd, shell_cmd)
-        
-        os.close(slave_fd)
-        terminal_id = str(uuid.uuid4())
-        
+            try:
+                os.execlp(shell_cmd, shell_cmd)
+            finally:
+                os._exit(127)
+        return pid
+    
+    def _take_warm(self, shell_cmd):
         with self.lock:
-            self.terminals[terminal_id] = {
-                "master_fd": master_fd,
-                "pid": pid,
-                "name": name,
-                "workspace": workspace,
-                "shell": shell,
-                "pending_output": b"",
-                "input_queue": b"",
-                "cols": 80,
-                "rows": 24,
-                "log": [],
-                "env_vars": {}
-            }
-        
-        threading.Thread(target=self._pty_reader, args=(terminal_id, master_fd), daemon=True).start()
-        threading.Thread(target=self._pty_writer, args=(terminal_id, master_fd), daemon=True).start()
-        return terminal_id
+            pool = self._pools.setdefault(shell_cmd, collections.deque())
+            while pool:
+                term = pool.popleft()
+                if term.exit_code is None and not term.closed:
+                    return term
+        return None
+    
+    def warm_pool(self, *shells):
+        if SHELL_POOL_SIZE <= 0:
+            return
+        with self.lock:
+            for shell_cmd in shells:
+                self._pools.setdefault(shell_cmd, collections.deque())
+        if self._pool_thread is None:
+            self._pool_thread = threading.Thread(target=self._pool_loop, name="pty-pool",
+                                                 daemon=True)
+            self._pool_thread.start()
+        self._pool_wanted.set()
+    
+    def _pool_loop(self):
+        while True:
+            self._pool_wanted.wait()
+            self._pool_wanted.clear()
+            with self.lock:
+                pools = list(self._pools.items())
+            for shell_cmd, pool in pools:
+                with self.lock:
+                    for term in [term for term in pool if term.exit_code is not None]:
+                        pool.remove(term)
+                while len(pool) < SHELL_POOL_SIZE:
+                    try:
+                        term = self._spawn(shell_cmd)
+                    except OSError:
+                        break
+                    with self.lock:
+                        pool.append(term)
+    
+    def pool_sizes(self):
+        with self.lock:
+            return {shell_cmd: len(pool) for shell_cmd, pool in self._pools.items()}
     
-    def _pty_reader(self, terminal_id, master_fd):
-        while terminal_id in self.terminals:
+    def _start_io_loop(self):
+        if self._io_thread is None:
+            self._io_thread = threading.Thread(target=self._io_loop, name="pty-io", daemon=True)
+            self._io_thread.start()
+    
+    def _submit(self, func, *args):
+        self._ops.append((func, args))
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            pass
+    
+    def _run_ops(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        while self._ops:
+            func, args = self._ops.popleft()
             try:
-                r, _, _ = select.select([master_fd], [], [], 0.01)
-                if r:
-                    data = os.read(master_fd, 16384)
-                    if data:
-                        with self.lock:
-                            term = self.terminals.get(terminal_id)
-                            if term:
-                                term["pending_output"] += data
-                                term["log"].append(data.decode('utf-8', errors='replace'))
-            except:
-                break
+                func(*args)
+            except (KeyError, ValueError, OSError):
+                pass
+    
+    def _io_loop(self):
+        while True:
+            for key, events in self.selector.select(self._reap_timeout()):
+                if key.fd == self._wake_r:
+                    self._run_ops()
+                    continue
+                term = key.data
+                try:
+                    if key.fd == term.pidfd:
+                        self._reap(term)
+                        continue
+                    if events & selectors.EVENT_READ:
+                        self._pty_read(term)
+                    if events & selectors.EVENT_WRITE:
+                        self._pty_write(term)
+                except Exception:
+                    # Stop watching this terminal rather than losing the loop for all of them
+                    traceback.print_exc()
+                    self._unregister(key.fd)
+            if self._children and time.monotonic() >= self._next_reap:
+                self._check_children()
     
-    def _pty_writer(self, terminal_id, master_fd):
-        while terminal_id in self.terminals:
+    def _watch_child(self, term):
+        self._children[term.pid] = term
+        if hasattr(os, "pidfd_open"):
             try:
-                with self.lock:
-                    term = self.terminals.get(terminal_id)
-                    if term and term["input_queue"]:
-                        os.write(master_fd, term["input_queue"])
-                        term["input_queue"] = b""
-                time.sleep(0.005)
-            except:
-                break
+                term.pidfd = os.pidfd_open(term.pid)
+            except OSError:
+                pass
+            else:
+                self.selector.register(term.pidfd, selectors.EVENT_READ, term)
+        self._reap(term)
     
-    def write_command(self, terminal_id, data):
+    def _reap_timeout(self):
+        if not self._children:
+            return None
+        if all(term.pidfd is not None and term.kill_deadline is None
+               for term in self._children.values()):
+            return None
+        return max(self._next_reap - time.monotonic(), 0)
+    
+    def _check_children(self):
+        now = time.monotonic()
+        self._next_reap = now + REAP_POLL_INTERVAL
+        for term in list(self._children.values()):
+            if term.kill_deadline is not None and now >= term.kill_deadline:
+                term.kill_deadline = None
+                try:
+                    os.kill(term.pid, signal.SIGKILL)
+                except OSError:
+                    pass
+            elif term.kill_deadline is not None:
+                self._next_reap = min(self._next_reap, term.kill_deadline)
+            if term.pidfd is None:
+                self._reap(term)
+    
+    def _reap(self, term):
+        try:
+            pid, status = os.waitpid(term.pid, os.WNOHANG)
+        except ChildProcessError:
+            pid, status = term.pid, None
+        if pid == 0:
+            return
+        self._children.pop(term.pid, None)
+        if term.pidfd is not None:
+            self._close_fd(term.pidfd)
+            term.pidfd = None
+        term.kill_deadline = None
+        term.exit_code = os.waitstatus_to_exitcode(status) if status is not None else -1
+        if not term.closed:
+            while self._pty_read(term):
+                pass
+        if self._mark_closed(term):
+            self._close_fd(term.master_fd)
+        with term.lock:
+            term.input_queue.clear()
+            listeners = list(term.listeners)
+            idle = not term.output.subscribers
+        if idle:
+            self._release(term)
+        for listener in listeners:
+            listener()
+    
+    def _mark_closed(self, term):
+        with term.lock:
+            if term.closed:
+                return False
+            term.closed = True
+            return True
+    
+    def _release(self, term):
         with self.lock:
-            term = self.terminals.get(terminal_id)
-            if term:
-                if isinstance(data, str):
-                    term["input_queue"] += data.encode('utf-8', errors='replace')
-                else:
-                    term["input_queue"] += data
+            if self.terminals.get(term.id) is term:
+                del self.terminals[term.id]
+        term.log.close()
+    
+    def _pty_read(self, term):
+        if term.closed:
+            return False
+        try:
+            data = os.read(term.master_fd, 16384)
+        except BlockingIOError:
+            return False
+        except OSError:
+            data = b""
+        stats = term.stats
+        if data:
+            term.log.append(data)
+            stats.reads += 1
+            stats.bytes_read += len(data)
+        waited = time.perf_counter()
+        with term.lock:
+            stats.lock_wait += time.perf_counter() - waited
+            if not data:
+                term.eof = True
+            else:
+                output = term.output
+                output.append(data)
+                backlog = output.backlog()
+                if backlog > stats.backlog_high:
+                    stats.backlog_high = backlog
+                if not term.read_paused and backlog >= OUTPUT_HIGH_WATER:
+                    term.read_paused = True
+                    stats.read_pauses += 1
+                    stats.paused_since = time.monotonic()
+            listeners = list(term.listeners)
+        if not data or term.read_paused:
+            self._update_interest(term)
+        for listener in listeners:
+            listener()
+        return bool(data)
+    
+    def _pty_write(self, term):
+        if term.closed:
+            return
+        with term.lock:
+            queue = term.input_queue
+            try:
+                written = os.writev(term.master_fd, queue.head()) if queue else 0
+            except BlockingIOError:
+                return
+            except OSError:
+                queue.clear()
+                written = 0
+            queue.consume(written)
+            term.stats.bytes_written += written
+            term.stats.writes += 1
+            done = not queue
+        if done:
+            self._update_interest(term)
+    
+    def _update_interest(self, term):
+        with term.lock:
+            if term.closed:
+                return
+            events = 0
+            if not term.read_paused and not term.eof:
+                events |= selectors.EVENT_READ
+            if term.input_queue:
+                events |= selectors.EVENT_WRITE
+        master_fd = term.master_fd
+        try:
+            key = self.selector.get_key(master_fd)
+        except KeyError:
+            key = None
+        if key is None:
+            if events:
+                self.selector.register(master_fd, events, term)
+        elif not events:
+            self.selector.unregister(master_fd)
+        elif key.events != events:
+            self.selector.modify(master_fd, events, term)
+    
+    def _resume_reading(self, term):
+        if term.read_paused and term.output.backlog() <= OUTPUT_LOW_WATER:
+            term.read_paused = False
+            term.stats.paused_seconds += time.monotonic() - term.stats.paused_since
+            self._submit(self._update_interest, term)
+    
+    def _unregister(self, master_fd):
+        try:
+            self.selector.unregister(master_fd)
+        except (KeyError, ValueError):
+            pass
+    
+    def _close_fd(self, master_fd):
+        self._unregister(master_fd)
+        try:
+            os.close(master_fd)
+        except OSError:
+            pass
+    
+    def add_listener(self, terminal_id, callback):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return False
+        with term.lock:
+            term.listeners.add(callback)
+            term.detached_at = None
+        return True
+    
+    def remove_listener(self, terminal_id, callback):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return
+        with term.lock:
+            term.listeners.discard(callback)
+            if not term.listeners:
+                term.detached_at = time.monotonic()
+    
+    def subscribe(self, terminal_id, offset=None, watch=False, notify=None):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return None
+        with term.lock:
+            ring = term.output
+            cursor = ring.end if offset is None else max(min(offset, ring.end), term.log.start, 0)
+            sub = OutputSubscriber(cursor, watch, notify)
+            ring.subscribers.add(sub)
+            if notify:
+                term.listeners.add(notify)
+            term.detached_at = None
+            return sub
+    
+    def unsubscribe(self, terminal_id, sub):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return
+        with term.lock:
+            term.output.subscribers.discard(sub)
+            term.output.trim()
+            if sub.notify:
+                term.listeners.discard(sub.notify)
+            if not term.listeners:
+                term.detached_at = time.monotonic()
+            self._resume_reading(term)
+            idle = term.exit_code is not None and not term.output.subscribers
+        if idle:
+            self._release(term)
+    
+    def reap_detached(self, terminal_id, grace=DETACH_GRACE_PERIOD):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return False
+        with term.lock:
+            if term.detached_at is None or time.monotonic() - term.detached_at < grace:
+                return False
+        self.kill_terminal(terminal_id)
+        return True
+    
+    def keep_alive(self, terminal_id):
+        # Restarts the grace period of a terminal that a tab holds without a socket
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return False
+        with term.lock:
+            if term.detached_at is not None:
+                term.detached_at = time.monotonic()
+        return True
+    
+    def list_terminals(self):
+        with self.lock:
+            terminals = list(self.terminals.values())
+        return [self._info(term) for term in terminals]
+    
+    def info(self, terminal_id):
+        term = self.terminals.get(terminal_id)
+        return self._info(term) if term else None
+    
+    def _info(self, term):
+        return {
+            "id": term.id,
+            "name": term.name,
+            "workspace": term.workspace,
+            "shell": term.shell,
+            "pid": term.pid,
+            "attached": bool(term.listeners),
+            "viewers": len(term.output.subscribers),
+            "exit_code": term.exit_code,
+        }
+    
+    def write_command(self, terminal_id, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8', errors='replace')
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return False
+        with term.lock:
+            if term.closed:
+                return False
+            stats = term.stats
+            queue = term.input_queue
+            if queue:
+                if not queue.append(data):
+                    stats.input_dropped += len(data)
+                    return False
+                stats.input_high = max(stats.input_high, len(queue))
                 return True
-        return False
+            try:
+                written = os.write(term.master_fd, data)
+            except BlockingIOError:
+                written = 0
+            except OSError:
+                return False
+            stats.bytes_written += written
+            stats.writes += 1
+            if written < len(data):
+                queue.append(memoryview(data)[written:])
+                stats.input_high = max(stats.input_high, len(queue))
+                self._submit(self._update_interest, term)
+            return True
+    
+    def read_output(self, terminal_id, sub, limit=None):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return b""
+        waited = time.perf_counter()
+        with term.lock:
+            term.stats.lock_wait += time.perf_counter() - waited
+            data = term.output.read(sub, limit)
+            if data is not None:
+                self._resume_reading(term)
+                return data
+        return self.catch_up(terminal_id, sub, limit or OUTPUT_BUFFER_LIMIT)
+    
+    def read_output_text(self, terminal_id, sub, limit=None):
+        return sub.decoder.decode(self.read_output(terminal_id, sub, limit))
+    
+    def catch_up(self, terminal_id, sub, limit):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return b""
+        with term.lock:
+            ring_start = term.output.start
+            cursor = sub.cursor
+        log = term.log
+        cursor = max(cursor, log.start)
+        stop = max(cursor, min(ring_start, cursor + limit))
+        data = b""
+        if stop > cursor:
+            try:
+                data = log.read(cursor, stop)
+            except (OSError, EOFError) as e:
+                # A viewer that cannot catch up skips the unreadable span instead of disconnecting
+                print(f"Scrollback read for {terminal_id} failed: {e}")
+        with term.lock:
+            sub.cursor = stop
+            term.stats.catch_up_bytes += len(data)
+            self._resume_reading(term)
+        return data
+    
+    def lagging(self, terminal_id, sub):
+        term = self.terminals.get(terminal_id)
+        return bool(term) and sub.cursor < term.output.start
+    
+    def pending_bytes(self, terminal_id, sub):
+        term = self.terminals.get(terminal_id)
+        return term.output.end - sub.cursor if term else 0
+    
+    def exit_status(self, terminal_id):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return True, None
+        return term.exit_code is not None, term.exit_code
+    
+    def record_frame(self, terminal_id, size, frames=1):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return
+        stats = term.stats
+        stats.frames += frames
+        stats.bytes_sent += size
+        stats.window_frames += frames
+        stats.window_bytes += size
+        now = time.monotonic()
+        elapsed = now - stats.window_start
+        if elapsed >= 1.0:
+            stats.frames_per_s = stats.window_frames / elapsed
+            stats.bytes_per_s = stats.window_bytes / elapsed
+            stats.window_start = now
+            stats.window_frames = 0
+            stats.window_bytes = 0
+    
+    def record_compression(self, terminal_id, mode, raw_size, compressed_size, seconds):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return
+        stats = term.stats
+        stats.compress_mode = mode
+        stats.raw_bytes += raw_size
+        stats.compressed_bytes += compressed_size
+        stats.compress_seconds += seconds
+    
+    def get_stats(self, terminal_id):
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return None
+        stats = term.stats
+        with term.lock:
+            backlog, buffered = term.output.backlog(), len(term.output)
+            viewers = [sub.watch for sub in term.output.subscribers]
+        return {
+            "frames": stats.frames,
+            "bytes_sent": stats.bytes_sent,
+            "frames_per_s": round(stats.frames_per_s, 2),
+            "bytes_per_s": round(stats.bytes_per_s, 2),
+            "bytes_per_frame": round(stats.bytes_sent / stats.frames, 2) if stats.frames else 0,
+            "pending_bytes": backlog,
+            "buffered_bytes": buffered,
+            "viewers": len(viewers),
+            "watchers": sum(viewers),
+            "catch_up_bytes": stats.catch_up_bytes,
+            "read_paused": term.read_paused,
+            "read_pauses": stats.read_pauses,
+            "compression": {
+                "mode": stats.compress_mode,
+                "raw_bytes": stats.raw_bytes,
+                "compressed_bytes": stats.compressed_bytes,
+                "ratio": (round(stats.raw_bytes / stats.compressed_bytes, 3)
+                          if stats.compressed_bytes else None),
+                "cpu_ms": round(stats.compress_seconds * 1000, 3),
+            },
+        }
     
-    def get_output(self, terminal_id):
+    def metrics(self, processes=()):
         with self.lock:
-            term = self.terminals.get(terminal_id)
-            if term and term["pending_output"]:
-                output = term["pending_output"].decode('utf-8', errors='replace')
-                term["pending_output"] = b""
-                return output
-        return ""
+            terminals = list(self.terminals.values())
+            pools = {shell_cmd: len(pool) for shell_cmd, pool in self._pools.items()}
+        labels = [(f'terminal="{term.id}",name="{_label(term.name)}",'
+                   f'shell="{_label(term.shell)}"', term) for term in terminals]
+        live = {}
+        for term in terminals:
+            # The viewer set and queues change on other threads; read them under the terminal lock
+            with term.lock:
+                live[term] = (term.output.backlog(), len(term.input_queue),
+                              len(term.output.subscribers))
+        
+        def family(name, kind, help_text, value):
+            return _metric(f"shell_matrix_terminal_{name}", kind, help_text,
+                           [(label, value(term)) for label, term in labels])
+        
+        lines = _metric("shell_matrix_terminals", "gauge", "Open terminals.",
+                        [("", len(terminals))])
+        lines += family("read_bytes_total", "counter", "Bytes read from the PTY.",
+                        lambda t: t.stats.bytes_read)
+        lines += family("reads_total", "counter", "PTY reads.", lambda t: t.stats.reads)
+        lines += family("written_bytes_total", "counter", "Bytes written to the PTY.",
+                        lambda t: t.stats.bytes_written)
+        lines += family("writes_total", "counter", "PTY writes.", lambda t: t.stats.writes)
+        lines += family("input_dropped_bytes_total", "counter",
+                        "Input dropped because the input queue was full.",
+                        lambda t: t.stats.input_dropped)
+        lines += family("sent_bytes_total", "counter", "Bytes sent to WebSocket clients.",
+                        lambda t: t.stats.bytes_sent)
+        lines += family("frames_total", "counter", "Frames sent to WebSocket clients.",
+                        lambda t: t.stats.frames)
+        lines += family("frames_per_second", "gauge",
+                        "Frames sent per second over the last window.",
+                        lambda t: round(t.stats.frames_per_s, 2))
+        lines += family("compress_input_bytes_total", "counter",
+                        "Bytes given to frame compression.", lambda t: t.stats.raw_bytes)
+        lines += family("compress_output_bytes_total", "counter",
+                        "Bytes produced by frame compression.", lambda t: t.stats.compressed_bytes)
+        lines += family("compress_cpu_seconds_total", "counter",
+                        "CPU time spent compressing frames.", lambda t: t.stats.compress_seconds)
+        lines += _metric("shell_matrix_terminal_compression_ratio", "gauge",
+                         "Uncompressed over compressed bytes.",
+                         [(label, round(term.stats.raw_bytes / term.stats.compressed_bytes, 3))
+                          for label, term in labels if term.stats.compressed_bytes])
+        lines += family("read_pauses_total", "counter",
+                        "Times PTY reads were paused for backpressure.",
+                        lambda t: t.stats.read_pauses)
+        lines += family("read_paused_seconds_total", "counter", "Time PTY reads spent paused.",
+                        lambda t: t.stats.paused_seconds)
+        lines += family("catch_up_bytes_total", "counter",
+                        "Bytes replayed from the scrollback log.",
+                        lambda t: t.stats.catch_up_bytes)
+        lines += family("lock_wait_seconds_total", "counter",
+                        "Time spent waiting for the terminal lock.",
+                        lambda t: t.stats.lock_wait)
+        lines += family("log_dropped_bytes_total", "counter",
+                        "Scrollback dropped because it could not be written to disk.",
+                        lambda t: t.log.dropped)
+        lines += family("output_backlog_bytes", "gauge",
+                        "Output not yet read by the slowest viewer.", lambda t: live[t][0])
+        lines += family("output_backlog_high_bytes", "gauge", "Highest output backlog seen.",
+                        lambda t: t.stats.backlog_high)
+        lines += family("input_queue_bytes", "gauge", "Input waiting to be written to the PTY.",
+                        lambda t: live[t][1])
+        lines += family("input_queue_high_bytes", "gauge", "Highest input queue depth seen.",
+                        lambda t: t.stats.input_high)
+        lines += family("viewers", "gauge", "Attached viewers.", lambda t: live[t][2])
+        lines += _metric("shell_matrix_pool_shells", "gauge", "Warm shells waiting in the pool.",
+                         [(f'shell="{_label(shell_cmd)}"', size)
+                          for shell_cmd, size in pools.items()])
+        lines += _metric("shell_matrix_pool_requests_total", "counter",
+                         "Terminal creations by pool outcome.",
+                         [('result="hit"', self.pool_hits), ('result="miss"', self.pool_misses)])
+        lines += self.create_latency.render("shell_matrix_create_seconds",
+                                            "Time to create a terminal.")
+        processes = list(processes)
+        lines += _metric("shell_matrix_threads", "gauge", "Live threads.",
+                         [(f'process="{process}"', threads) for process, threads, rss in processes])
+        lines += _metric("shell_matrix_resident_memory_bytes", "gauge", "Resident set size.",
+                         [(f'process="{process}"', rss) for process, threads, rss in processes])
+        return lines
     
     def resize_pty(self, terminal_id, cols, rows):
-        with self.lock:
-            term = self.terminals.get(terminal_id)
-            if term:
-                term["cols"] = cols
-                term["rows"] = rows
-                try:
-                    fcntl.ioctl(term["master_fd"], termios.TIOCSWINSZ,
-                              struct.pack("HHHH", rows, cols, 0, 0))
-                except:
-                    pass
+        term = self.terminals.get(terminal_id)
+        if not term:
+            return
+        with term.lock:
+            if term.closed:
+                return
+            term.cols = cols
+            term.rows = rows
+            try:
+                fcntl.ioctl(term.master_fd, termios.TIOCSWINSZ,
+                          struct.pack("HHHH", rows, cols, 0, 0))
+            except:
+                pass
+    
+    def get_scrollback(self, terminal_id):
+        term = self.terminals.get(terminal_id)
+        return term.log if term else None
     
     def get_log(self, terminal_id):
-        with self.lock:
-            term = self.terminals.get(terminal_id)
-            if term:
-                return "".join(term["log"])
+        term = self.terminals.get(terminal_id)
+        if term:
+            return term.log.read().decode('utf-8', errors='replace')
         return ""
     
     def kill_terminal(self, terminal_id):
         with self.lock:
-            term = self.terminals.get(terminal_id)
-            if term:
+            term = self.terminals.pop(terminal_id, None)
+        if term:
+            if self._mark_closed(term):
+                self._submit(self._close_fd, term.master_fd)
+            if term.exit_code is None:
                 try:
-                    os.kill(term["pid"], signal.SIGTERM)
-                    os.close(term["master_fd"])
+                    os.kill(term.pid, signal.SIGTERM)
                 except:
                     pass
-                self.terminals.pop(terminal_id, None)
+                term.kill_deadline = time.monotonic() + KILL_TIMEOUT
+                self._submit(self._check_children)
+            term.log.close()
+            for listener in list(term.listeners):
+                listener()
 
 pty_manager = PTYManager()
 
-@app.get("/", response_class=HTMLResponse)
-async def dashboard():
-    html = r"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>>_ SHELL MATRIX - N0rd</title>
-    <script src="https://cdn.jsdelivr.net/npm/xterm@5.3.0/lib/xterm.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/xterm-addon-fit@0.8.0/lib/xterm-addon-fit.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/xterm-addon-search@0.13.0/lib/xterm-addon-search.js"></script>
-    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/xterm@5.3.0/css/xterm.css">
-    <style>
+DASHBOARD_CSS = r"""
         :root {
             --bg-dark: #1a1a1a;
             --bg-gray: #2a2a2a;
@@ -590,172 +1720,9 @@ async def dashboard():
             color: var(--cyan);
             margin-left: 10px;
         }
-    </style>
-</head>
-<body class="theme-green">
-    <div class="header">
-        <h1>
-            <span class="prompt-blink">>_</span>
-            <span>SHELL MATRIX</span>
-            <span style="color: #666; font-size: 14px;">- N0rd</span>
-        </h1>
-        <div>
-            <select id="language-selector" class="btn" style="padding: 8px 15px; margin-right: 10px;">
-                <option value="pt">🇧🇷 Português</option>
-                <option value="en">🇺🇸 English</option>
-            </select>
-            <button id="new-tab" class="btn">+ Nova Aba (Ctrl+Shift+T)</button>
-            <button id="snippets-btn" class="btn">Snippets</button>
-            <button id="sessions-btn" class="btn">Sessoes</button>
-            <button id="settings-btn" class="btn">Config</button>
-        </div>
-    </div>
-    
-    <div id="status" class="status">
-        <div>Abas: <span id="count">0</span></div>
-        <div>WS: <span id="active-ws">WS1</span></div>
-        <div>Tema: <span id="theme-name">Verde</span></div>
-    </div>
-    
-    <div class="workspaces" id="workspaces">
-        <div class="workspace-tab active" data-ws="ws1" oncontextmenu="kaliTerm.showWorkspaceMenu(event, 'ws1'); return false;">
-            <span class="ws-name">WS1</span>
-        </div>
-        <button class="btn" id="new-ws" style="padding: 8px 12px; font-size: 12px;">+ WS</button>
-    </div>
-    
-    <div id="ws-context-menu" class="ws-context-menu">
-        <div class="ws-context-item" onclick="kaliTerm.renameWorkspace()">Renomear</div>
-        <div class="ws-context-item" onclick="kaliTerm.configProxy()">Configurar Proxy</div>
-        <div class="ws-context-item" onclick="kaliTerm.deleteWorkspace()">Deletar</div>
-        <div class="ws-context-item" onclick="kaliTerm.closeContextMenu()">Cancelar</div>
-    </div>
-    
-    <div id="workspace-area"></div>
-    <div id="dock"></div>
-
-    <div id="new-tab-modal" class="modal">
-        <div class="modal-content">
-            <h2>Nova Aba</h2>
-            <label>Nome:</label>
-            <input type="text" id="tab-name" value="Nova Aba">
-            
-            <label>Tipo:</label>
-            <select id="tab-type">
-                <option value="terminal">Terminal</option>
-                <option value="browser">Navegador</option>
-                <option value="editor">Editor de Texto</option>
-                <option value="snippet">Snippets</option>
-            </select>
-            
-            <label>Shell (apenas terminal):</label>
-            <select id="tab-shell">
-                <option value="bash">Bash</option>
-                <option value="zsh">Zsh</option>
-                <option value="fish">Fish</option>
-                <option value="sh">Sh</option>
-            </select>
-            
-            <div class="modal-buttons">
-                <button class="btn" id="cancel-tab">Cancelar</button>
-                <button class="btn" id="create-tab">Criar</button>
-            </div>
-        </div>
-    </div>
+"""
 
-    <div id="proxy-modal" class="modal">
-        <div class="modal-content">
-            <h2>Configurar Proxy</h2>
-            <p style="color: var(--green); font-size: 12px; margin-bottom: 15px;">
-                Todas as ferramentas neste workspace usarao este proxy
-            </p>
-            
-            <label>Tipo:</label>
-            <select id="proxy-type">
-                <option value="http">HTTP</option>
-                <option value="https">HTTPS</option>
-                <option value="socks5">SOCKS5</option>
-            </select>
-            
-            <label>Host:</label>
-            <input type="text" id="proxy-host" placeholder="127.0.0.1">
-            
-            <label>Porta:</label>
-            <input type="number" id="proxy-port" placeholder="8080">
-            
-            <label>Usuario (opcional):</label>
-            <input type="text" id="proxy-user" placeholder="username">
-            
-            <label>Senha (opcional):</label>
-            <input type="password" id="proxy-pass" placeholder="password">
-            
-            <div style="margin: 15px 0;">
-                <button class="btn" onclick="kaliTerm.testProxy()" style="width: 100%;">Testar Proxy</button>
-            </div>
-            
-            <div class="modal-buttons">
-                <button class="btn" onclick="kaliTerm.removeProxy()">Remover Proxy</button>
-                <button class="btn" id="save-proxy">Salvar</button>
-            </div>
-        </div>
-    </div>
-
-    <div id="settings-modal" class="modal">
-        <div class="modal-content">
-            <h2>Configuracoes</h2>
-            
-            <label>Tema:</label>
-            <div class="theme-selector">
-                <div class="theme-btn green" onclick="kaliTerm.setTheme('green')"></div>
-                <div class="theme-btn red" onclick="kaliTerm.setTheme('red')"></div>
-                <div class="theme-btn blue" onclick="kaliTerm.setTheme('blue')"></div>
-                <div class="theme-btn purple" onclick="kaliTerm.setTheme('purple')"></div>
-            </div>
-            
-            <label>Auto-save Editor (segundos):</label>
-            <input type="number" id="autosave-interval" value="5" min="1">
-            
-            <label>Atalhos de Teclado:</label>
-            <div style="font-size: 12px; color: var(--green); margin: 10px 0;">
-                • Ctrl+Shift+T - Nova aba<br>
-                • Ctrl+W - Fechar aba<br>
-                • Ctrl+F - Buscar no terminal<br>
-                • Alt+1/2/3 - Trocar workspace<br>
-                • F11 - Maximizar aba<br>
-                • Clique direito no WS - Menu workspace
-            </div>
-            
-            <div class="modal-buttons">
-                <button class="btn" id="close-settings">Fechar</button>
-            </div>
-        </div>
-    </div>
-
-    <div id="sessions-modal" class="modal">
-        <div class="modal-content">
-            <h2>Gerenciar Sessoes</h2>
-            
-            <label>Salvar Sessao Atual:</label>
-            <input type="text" id="session-name" placeholder="Nome da sessao">
-            <button class="btn" id="save-session" style="width: 100%; margin: 10px 0;">Salvar</button>
-            
-            <label>Sessoes Salvas:</label>
-            <div id="sessions-list" style="max-height: 300px; overflow-y: auto;">
-            </div>
-            
-            <div class="modal-buttons">
-                <button class="btn" id="close-sessions">Fechar</button>
-            </div>
-        </div>
-    </div>
-
-    <div id="snippets-panel" class="snippets-panel">
-        <h3 style="color: var(--red-main); margin-bottom: 20px;">Snippets</h3>
-        <button class="btn" style="width: 100%; margin-bottom: 10px;" id="add-snippet">+ Novo Snippet</button>
-        <div id="snippets-list"></div>
-    </div>
-
-    <script>
+DASHBOARD_JS = r"""
         const translations = {
             pt: {
                 newTab: '+ Nova Aba (Ctrl+Shift+T)',
@@ -793,6 +1760,12 @@ async def dashboard():
                 settings: 'Configuracoes',
                 autoSave: 'Auto-save Editor (segundos):',
                 shortcuts: 'Atalhos de Teclado:',
+                compression: 'Compressao de saida (novos terminais):',
+                compressionNone: 'Nenhuma',
+                renderer: 'Renderizador (novos terminais):',
+                rendererDom: 'DOM (padrao)',
+                scrollback: 'Linhas de historico (padrao):',
+                scrollbackTab: 'Linhas de historico (apenas terminal):',
                 shortcutsDesc: '• Ctrl+Shift+T - Nova aba<br>• Ctrl+W - Fechar aba<br>• Ctrl+F - Buscar no terminal<br>• Alt+1/2/3 - Trocar workspace<br>• F11 - Maximizar aba<br>• Clique direito no WS - Menu workspace',
                 close: 'Fechar',
                 manageSessions: 'Gerenciar Sessoes',
@@ -821,7 +1794,11 @@ async def dashboard():
                 corsError: 'Nao foi possivel carregar no iframe (CORS).\nDeseja abrir em nova janela?',
                 newTabName: 'Nova Aba',
                 newName: 'Novo nome:',
-                editorPlaceholder: 'Digite ou cole seu texto aqui...'
+                editorPlaceholder: 'Digite ou cole seu texto aqui...',
+                watching: 'Observando (somente leitura)',
+                watchLinkCopied: 'Link de observacao copiado!',
+                processExited: 'processo encerrado com codigo',
+                processTerminated: 'processo finalizado'
             },
             en: {
                 newTab: '+ New Tab (Ctrl+Shift+T)',
@@ -859,6 +1836,12 @@ async def dashboard():
                 settings: 'Settings',
                 autoSave: 'Editor Auto-save (seconds):',
                 shortcuts: 'Keyboard Shortcuts:',
+                compression: 'Output compression (new terminals):',
+                compressionNone: 'None',
+                renderer: 'Renderer (new terminals):',
+                rendererDom: 'DOM (default)',
+                scrollback: 'Scrollback lines (default):',
+                scrollbackTab: 'Scrollback lines (terminal only):',
                 shortcutsDesc: '• Ctrl+Shift+T - New tab<br>• Ctrl+W - Close tab<br>• Ctrl+F - Search in terminal<br>• Alt+1/2/3 - Switch workspace<br>• F11 - Maximize tab<br>• Right-click on WS - Workspace menu',
                 close: 'Close',
                 manageSessions: 'Manage Sessions',
@@ -887,10 +1870,20 @@ async def dashboard():
                 corsError: 'Could not load in iframe (CORS).\nDo you want to open in a new window?',
                 newTabName: 'New Tab',
                 newName: 'New name:',
-                editorPlaceholder: 'Type or paste your text here...'
+                editorPlaceholder: 'Type or paste your text here...',
+                watching: 'Watching (read-only)',
+                watchLinkCopied: 'Watch link copied!',
+                processExited: 'process exited with code',
+                processTerminated: 'process terminated'
             }
         };
 
+        const FLOW_ACK_BYTES = 128 * 1024;
+        const HIDDEN_BUFFER_BYTES = 1024 * 1024;
+        const KEEPALIVE_MS = 60 * 1000;
+        const DEFAULT_SCROLLBACK = 10000;
+        const textEncoder = new TextEncoder();
+        
         class KaliTerminal {
             constructor() {
                 this.terminals = new Map();
@@ -903,10 +1896,12 @@ async def dashboard():
                 this.snippets = this.loadSnippets();
                 this.sessions = this.loadSessions();
                 this.contextMenuWs = null;
+                this.rendererScripts = {};
                 this.currentLang = localStorage.getItem('shell_matrix_lang') || 'pt';
                 this.init();
                 this.loadLastSession();
                 this.applyLanguage();
+                this.openWatchFromHash();
             }
             
             init() {
@@ -930,6 +1925,18 @@ async def dashboard():
                 document.getElementById('add-snippet').onclick = () => this.addSnippet();
                 document.getElementById('save-proxy').onclick = () => this.saveProxy();
                 
+                const compressionSetting = document.getElementById('compression-setting');
+                compressionSetting.value = localStorage.getItem('shell_matrix_compression') || '';
+                compressionSetting.onchange = (e) => localStorage.setItem('shell_matrix_compression', e.target.value);
+                
+                const rendererSetting = document.getElementById('renderer-setting');
+                rendererSetting.value = localStorage.getItem('shell_matrix_renderer') || '';
+                rendererSetting.onchange = (e) => localStorage.setItem('shell_matrix_renderer', e.target.value);
+                
+                const scrollbackSetting = document.getElementById('scrollback-setting');
+                scrollbackSetting.value = this.defaultScrollback();
+                scrollbackSetting.onchange = (e) => localStorage.setItem('shell_matrix_scrollback', e.target.value);
+                
                 document.addEventListener('click', () => this.closeContextMenu());
                 
                 document.addEventListener('keydown', (e) => {
@@ -965,6 +1972,7 @@ async def dashboard():
                 });
                 
                 setInterval(() => this.autoSaveSession(), 30000);
+                setInterval(() => this.keepAliveTerminals(), KEEPALIVE_MS);
                 this.renderSnippets();
             }
             
@@ -995,6 +2003,7 @@ async def dashboard():
                     if (labels[0]) labels[0].textContent = this.t('name');
                     if (labels[1]) labels[1].textContent = this.t('type');
                     if (labels[2]) labels[2].textContent = this.t('shellOnly');
+                    if (labels[3]) labels[3].textContent = this.t('scrollbackTab');
                     
                     document.getElementById('tab-name').value = this.t('newTabName');
                     
@@ -1032,6 +2041,13 @@ async def dashboard():
                     if (labels[0]) labels[0].textContent = this.t('theme') + ':';
                     if (labels[1]) labels[1].textContent = this.t('autoSave');
                     if (labels[2]) labels[2].textContent = this.t('shortcuts');
+                    if (labels[3]) labels[3].textContent = this.t('compression');
+                    const compressionNone = document.querySelector('#compression-setting option[value=""]');
+                    if (compressionNone) compressionNone.textContent = this.t('compressionNone');
+                    if (labels[4]) labels[4].textContent = this.t('renderer');
+                    if (labels[5]) labels[5].textContent = this.t('scrollback');
+                    const rendererDom = document.querySelector('#renderer-setting option[value=""]');
+                    if (rendererDom) rendererDom.textContent = this.t('rendererDom');
                     
                     const shortcutsDiv = settingsModal.querySelector('div[style*="font-size: 12px"]');
                     if (shortcutsDiv) shortcutsDiv.innerHTML = this.t('shortcutsDesc');
@@ -1232,13 +2248,24 @@ ${this.t('testProxyDesc')}`);
             loadWorkspaces() {
                 const saved = localStorage.getItem('shell_matrix_workspaces');
                 if (saved) {
-                    this.workspaces = JSON.parse(saved);
-                    Object.keys(this.workspaces).forEach(wsId => {
-                        this.updateWorkspaceProxyIndicator(wsId);
-                    });
+                    this.restoreWorkspaces(JSON.parse(saved));
                 }
             }
             
+            restoreWorkspaces(workspaces) {
+                document.querySelectorAll('.workspace-tab').forEach(tab => {
+                    if (tab.dataset.ws !== 'ws1') tab.remove();
+                });
+                this.workspaces = workspaces;
+                if (!this.workspaces.ws1) this.workspaces.ws1 = {id: 'ws1', name: 'WS1', proxy: null};
+                document.querySelector('[data-ws="ws1"] .ws-name').textContent = this.workspaces.ws1.name;
+                Object.keys(this.workspaces).forEach(wsId => {
+                    if (wsId !== 'ws1') this.addWorkspaceTab(wsId);
+                    this.workspaceCount = Math.max(this.workspaceCount, parseInt(wsId.slice(2), 10) || 0);
+                    this.updateWorkspaceProxyIndicator(wsId);
+                });
+            }
+            
             loadSnippets() {
                 const saved = localStorage.getItem('shell_matrix_snippets');
                 return saved ? JSON.parse(saved) : [
@@ -1311,6 +2338,8 @@ ${this.t('testProxyDesc')}`);
                         name: data.name,
                         type: data.type,
                         workspace: data.workspace,
+                        scrollback: data.scrollback,
+                        shell: data.shell,
                         content: data.type === 'editor' ? data.element.querySelector('textarea').value : ''
                     });
                 });
@@ -1326,8 +2355,13 @@ ${this.t('testProxyDesc')}`);
                 if (!session) return;
                 
                 this.terminals.forEach((_, id) => this.closeTab(id));
+                if (session.workspaces) {
+                    this.restoreWorkspaces(session.workspaces);
+                    this.saveWorkspaces();
+                }
                 
                 session.tabs.forEach(tab => {
+                    if (!this.workspaces[tab.workspace]) tab.workspace = 'ws1';
                     if (tab.type === 'editor') {
                         const id = 'editor-' + Date.now() + Math.random();
                         this.renderEditor(id, tab.name, tab.workspace);
@@ -1338,10 +2372,15 @@ ${this.t('testProxyDesc')}`);
                     } else if (tab.type === 'browser') {
                         this.createBrowser(tab.name);
                     } else {
-                        this.createTerminal(tab.name);
+                        this.addPlaceholder('new-' + Date.now() + Math.random(), {
+                            name: tab.name, workspace: tab.workspace, scrollback: tab.scrollback, shell: tab.shell, uncreated: true
+                        });
                     }
                 });
                 
+                this.saveLiveTerminals();
+                this.switchWorkspace(this.currentWorkspace in this.workspaces ? this.currentWorkspace : 'ws1');
+                this.updateCount();
                 this.hideSessions();
             }
             
@@ -1351,6 +2390,7 @@ ${this.t('testProxyDesc')}`);
             
             loadLastSession() {
                 this.loadWorkspaces();
+                this.restoreLiveTerminals();
             }
             
             renderSessionsList() {
@@ -1393,6 +2433,7 @@ ${this.t('testProxyDesc')}`);
             
             showNewTabModal() {
                 document.getElementById('new-tab-modal').classList.add('active');
+                document.getElementById('tab-scrollback').value = this.defaultScrollback();
                 document.getElementById('tab-name').focus();
             }
             
@@ -1404,6 +2445,7 @@ ${this.t('testProxyDesc')}`);
                 const name = document.getElementById('tab-name').value || this.t('newTabName');
                 const type = document.getElementById('tab-type').value;
                 const shell = document.getElementById('tab-shell').value;
+                const scrollback = parseInt(document.getElementById('tab-scrollback').value, 10) || this.defaultScrollback();
                 
                 this.hideNewTabModal();
                 
@@ -1414,7 +2456,7 @@ ${this.t('testProxyDesc')}`);
                 } else if (type === 'snippet') {
                     this.createSnippetEditor(name);
                 } else {
-                    this.createTerminal(name, shell);
+                    this.createTerminal(name, shell, scrollback);
                 }
             }
             
@@ -1542,22 +2584,29 @@ ${this.t('testProxyDesc')}`);
                 }
             }
             
-            createTerminal(name, shell = 'bash') {
+            createTerminal(name, shell = 'bash', scrollback = this.defaultScrollback(), workspace = this.currentWorkspace) {
                 fetch('/api/terminals', {
                     method: 'POST',
                     headers: {'Content-Type': 'application/json'},
                     body: JSON.stringify({
                         name: name || `Terminal ${this.terminals.size + 1}`, 
-                        workspace: this.currentWorkspace,
+                        workspace: workspace,
                         shell: shell
                     })
                 })
                 .then(r => r.json())
                 .then(data => {
-                    this.renderTerminal(data, this.currentWorkspace);
+                    if (data.error) {
+                        alert(data.error);
+                        return;
+                    }
+                    data.scrollback = scrollback;
+                    data.shell = shell;
+                    this.renderTerminal(data, workspace);
+                    if (workspace !== this.currentWorkspace) this.switchWorkspace(this.currentWorkspace);
                     this.updateCount();
                     
-                    const proxy = this.workspaces[this.currentWorkspace].proxy;
+                    const proxy = this.workspaces[workspace].proxy;
                     if (proxy) {
                         setTimeout(() => {
                             const ws = this.terminals.get(data.id).ws;
@@ -1588,18 +2637,22 @@ ${this.t('testProxyDesc')}`);
                 const wsId = 'ws' + this.workspaceCount;
                 const wsName = 'WS' + this.workspaceCount;
                 this.workspaces[wsId] = {id: wsId, name: wsName, proxy: null};
+                this.addWorkspaceTab(wsId);
                 
+                this.switchWorkspace(wsId);
+                this.saveWorkspaces();
+            }
+            
+            addWorkspaceTab(wsId) {
                 const tabs = document.getElementById('workspaces');
                 const tab = document.createElement('div');
                 tab.className = 'workspace-tab';
                 tab.dataset.ws = wsId;
-                tab.innerHTML = `<span class="ws-name">${wsName}</span>`;
+                tab.innerHTML = `<span class="ws-name"></span>`;
+                tab.querySelector('.ws-name').textContent = this.workspaces[wsId].name;
                 tab.onclick = () => this.switchWorkspace(wsId);
                 tab.oncontextmenu = (e) => { this.showWorkspaceMenu(e, wsId); return false; };
                 tabs.insertBefore(tab, document.getElementById('new-ws'));
-                
-                this.switchWorkspace(wsId);
-                this.saveWorkspaces();
             }
             
             switchWorkspace(wsId) {
@@ -1612,13 +2665,43 @@ ${this.t('testProxyDesc')}`);
                 });
                 
                 document.getElementById('active-ws').textContent = this.workspaces[wsId].name;
+                this.materializeWorkspace(wsId);
                 
                 document.querySelectorAll('.terminal-container').forEach(container => {
                     const tabData = this.terminals.get(container.id);
                     if (tabData && tabData.workspace === wsId && !this.minimized.has(container.id)) {
                         container.style.display = 'block';
+                        this.setHidden(tabData, false);
                     } else {
                         container.style.display = 'none';
+                        if (tabData) this.setHidden(tabData, true);
+                    }
+                });
+            }
+            
+            addPlaceholder(id, entry) {
+                // Terminals of workspaces that have not been shown yet get no xterm or
+                // socket; materializeWorkspace() creates them on the first switch
+                this.terminals.set(id, {
+                    type: 'terminal',
+                    placeholder: true,
+                    uncreated: !!entry.uncreated,
+                    name: entry.name,
+                    shell: entry.shell,
+                    workspace: entry.workspace,
+                    scrollback: entry.scrollback,
+                    element: null
+                });
+            }
+            
+            materializeWorkspace(wsId) {
+                this.terminals.forEach((t, id) => {
+                    if (!t.placeholder || t.workspace !== wsId) return;
+                    if (t.uncreated) {
+                        this.terminals.delete(id);
+                        this.createTerminal(t.name, t.shell, t.scrollback, wsId);
+                    } else {
+                        this.renderTerminal({id, name: t.name, scrollback: t.scrollback, shell: t.shell}, wsId);
                     }
                 });
             }
@@ -1629,6 +2712,7 @@ ${this.t('testProxyDesc')}`);
                 
                 this.minimized.add(id);
                 t.element.style.display = 'none';
+                this.setHidden(t, true);
                 
                 const dock = document.getElementById('dock');
                 const item = document.createElement('div');
@@ -1645,6 +2729,7 @@ ${this.t('testProxyDesc')}`);
                 
                 this.minimized.delete(id);
                 t.element.style.display = 'block';
+                this.setHidden(t, false);
                 
                 const dockItem = document.getElementById('dock-' + id);
                 if (dockItem) dockItem.remove();
@@ -1686,6 +2771,7 @@ ${this.t('testProxyDesc')}`);
                 const newName = prompt(this.t('newName'), tabData.name);
                 if (newName && newName.trim()) {
                     tabData.name = newName.trim();
+                    this.saveLiveTerminals();
                     const titleSpan = tabData.element.querySelector('.terminal-title span');
                     if (titleSpan) {
                         titleSpan.textContent = '[' + this.workspaces[tabData.workspace].name + '] ' + newName.trim();
@@ -1694,16 +2780,10 @@ ${this.t('testProxyDesc')}`);
             }
             
             downloadLog(id) {
-                fetch('/api/terminals/' + id + '/log')
-                    .then(r => r.text())
-                    .then(log => {
-                        const blob = new Blob([log], {type: 'text/plain'});
-                        const url = URL.createObjectURL(blob);
-                        const a = document.createElement('a');
-                        a.href = url;
-                        a.download = 'terminal-log.txt';
-                        a.click();
-                    });
+                const a = document.createElement('a');
+                a.href = '/api/terminals/' + id + '/log';
+                a.download = 'terminal-log.txt';
+                a.click();
             }
             
             renderEditor(editorId, name, workspace) {
@@ -1818,6 +2898,7 @@ ${this.t('testProxyDesc')}`);
                         <div>
                             <button class="btn btn-small" onclick="kaliTerm.showSearch('${terminalId}')">FIND</button>
                             <button class="btn btn-small" onclick="kaliTerm.downloadLog('${terminalId}')">LOG</button>
+                            <button class="btn btn-small" onclick="kaliTerm.copyWatchLink('${terminalId}')">SHARE</button>
                             <button class="btn btn-small" onclick="kaliTerm.splitVertical('${terminalId}')">SPLIT</button>
                             <button class="btn btn-small" onclick="kaliTerm.minimize('${terminalId}')">-</button>
                             <button class="btn btn-small" onclick="kaliTerm.toggleMaximize('${terminalId}')">[]</button>
@@ -1853,7 +2934,8 @@ ${this.t('testProxyDesc')}`);
                     },
                     fontFamily: "'Courier New', monospace",
                     fontSize: 15,
-                    scrollback: 10000
+                    scrollback: data.scrollback || this.defaultScrollback(),
+                    disableStdin: !!data.watch
                 });
                 
                 const fitAddon = new FitAddon.FitAddon();
@@ -1864,29 +2946,260 @@ ${this.t('testProxyDesc')}`);
                 term.open(document.getElementById('xterm-' + terminalId));
                 fitAddon.fit();
                 
-                const wsUrl = (window.location.protocol === 'https:' ? 'wss:' : 'ws:') + 
-                             '//' + window.location.host + '/ws/' + terminalId;
-                const ws = new WebSocket(wsUrl);
+                this.setupDrag(terminalDiv);
                 
-                ws.onopen = () => console.log('WS conectado');
-                ws.onmessage = (e) => term.write(e.data);
-                ws.onerror = (e) => console.error('WS erro:', e);
+                const t = {
+                    type: 'terminal',
+                    id: terminalId,
+                    name: data.name,
+                    term, ws: null, searchAddon, fitAddon,
+                    element: terminalDiv,
+                    workspace: workspace,
+                    offset: 0,
+                    watch: !!data.watch,
+                    closing: false,
+                    scrollback: term.options.scrollback,
+                    shell: data.shell,
+                    rendererName: localStorage.getItem('shell_matrix_renderer') || '',
+                    renderer: null,
+                    hidden: false,
+                    pending: [],
+                    pendingBytes: 0,
+                    pendingOffset: null,
+                    suspended: false
+                };
+                this.terminals.set(terminalId, t);
+                this.loadRenderer(t);
                 
-                term.onData((data) => {
-                    if (ws.readyState === WebSocket.OPEN) {
-                        ws.send(data);
+                term.onData((input) => {
+                    if (t.ws && t.ws.readyState === WebSocket.OPEN) {
+                        t.ws.send(textEncoder.encode(input));
                     }
                 });
                 
-                this.setupDrag(terminalDiv);
+                this.connectTerminal(terminalId);
+                this.saveLiveTerminals();
+            }
+            
+            connectTerminal(terminalId, attempt = 0) {
+                const t = this.terminals.get(terminalId);
+                if (!t || t.closing) return;
                 
-                this.terminals.set(terminalId, { 
-                    type: 'terminal',
-                    name: data.name,
-                    term, ws, searchAddon, fitAddon,
-                    element: terminalDiv,
-                    workspace: workspace 
+                const compression = localStorage.getItem('shell_matrix_compression') || '';
+                const wsUrl = (window.location.protocol === 'https:' ? 'wss:' : 'ws:') + 
+                             '//' + window.location.host + '/ws/' + terminalId +
+                             '?mode=binary&flow=1&offset=' + t.offset + '&tail=' + (t.scrollback + t.term.rows) +
+                             (t.watch ? '&watch=1' : '') +
+                             (compression ? '&compress=' + compression : '');
+                const ws = new WebSocket(wsUrl);
+                ws.binaryType = 'arraybuffer';
+                t.ws = ws;
+                
+                let writeChain = Promise.resolve();
+                let base = t.offset;
+                let received = 0;
+                let processed = 0;
+                let acked = 0;
+                const consumed = (count) => {
+                    processed += count;
+                    if (processed - acked >= FLOW_ACK_BYTES && ws.readyState === WebSocket.OPEN) {
+                        acked = processed;
+                        ws.send(JSON.stringify({type: 'ack', bytes: processed}));
+                    }
+                };
+                const writeBytes = (bytes) => {
+                    if (t.ws !== ws) return;
+                    if (t.hidden && t.pendingOffset === null) t.pendingOffset = t.offset;
+                    received += bytes.length;
+                    t.offset = base + received;
+                    if (t.hidden) {
+                        // Hidden terminals are not parsed; their output is kept (and acked, so
+                        // the shell keeps running) until they are shown. Past HIDDEN_BUFFER_BYTES
+                        // the buffer and socket are dropped and the server's scrollback holds it
+                        t.pending.push(bytes);
+                        t.pendingBytes += bytes.length;
+                        consumed(bytes.length);
+                        if (t.pendingBytes > HIDDEN_BUFFER_BYTES) this.suspendTerminal(t);
+                        return;
+                    }
+                    t.term.write(bytes, () => consumed(bytes.length));
+                };
+                
+                ws.onopen = () => {
+                    attempt = 0;
+                    console.log('WS conectado');
+                };
+                ws.onmessage = (e) => {
+                    if (t.ws !== ws) return;
+                    if (typeof e.data === 'string') {
+                        const msg = JSON.parse(e.data);
+                        if (msg.type === 'attach') {
+                            base = msg.offset;
+                            t.offset = base;
+                        } else if (msg.type === 'exited') {
+                            t.exited = true;
+                            const note = msg.code === null ? this.t('processTerminated') : this.t('processExited') + ' ' + msg.code;
+                            writeChain = writeChain.then(() => this.writeTerminal(t, '\r\n[' + note + ']\r\n'));
+                        }
+                    } else if (!compression) {
+                        writeBytes(new Uint8Array(e.data));
+                    } else {
+                        const frame = new Uint8Array(e.data);
+                        writeChain = writeChain
+                            .then(() => this.decodeFrame(frame))
+                            .then(writeBytes)
+                            .catch((err) => console.error('WS frame:', err));
+                    }
+                };
+                ws.onerror = (e) => console.error('WS erro:', e);
+                ws.onclose = (e) => {
+                    if (t.closing || t.exited || t.ws !== ws || this.terminals.get(terminalId) !== t) return;
+                    if (e.code === 4404) {
+                        this.writeTerminal(t, '\r\n[session closed]\r\n');
+                        return;
+                    }
+                    const delay = Math.min(500 * Math.pow(2, attempt), 10000);
+                    setTimeout(() => this.connectTerminal(terminalId, attempt + 1), delay);
+                };
+            }
+            
+            writeTerminal(t, text) {
+                if (t.hidden) t.pending.push(text);
+                else t.term.write(text);
+            }
+            
+            keepAliveTerminals() {
+                // A terminal without a socket (suspended, or a placeholder not shown yet) is
+                // reaped DETACH_GRACE_PERIOD after its last connection closed unless the tab
+                // holding it says it is still wanted
+                this.terminals.forEach((t, id) => {
+                    const held = t.suspended || (t.placeholder && !t.uncreated);
+                    if (t.type !== 'terminal' || !held) return;
+                    fetch('/api/terminals/' + id + '/keepalive', {method: 'POST'})
+                        .catch(e => console.error('Erro:', e));
+                });
+            }
+            
+            suspendTerminal(t) {
+                // Reconnect from the first dropped byte when shown; the tail bound on the
+                // replay keeps that to what the scrollback can hold, and keepAliveTerminals()
+                // keeps the server from reaping the terminal meanwhile
+                const ws = t.ws;
+                t.suspended = true;
+                t.ws = null;
+                t.offset = t.pendingOffset;
+                t.pending = [];
+                t.pendingBytes = 0;
+                t.pendingOffset = null;
+                ws.close();
+            }
+            
+            setHidden(t, hidden) {
+                if (t.type !== 'terminal' || t.hidden === hidden) return;
+                t.hidden = hidden;
+                if (hidden) {
+                    // Release the renderer's canvas/WebGL context while nothing is drawn
+                    if (t.renderer) t.renderer.dispose();
+                    t.renderer = null;
+                    return;
+                }
+                this.loadRenderer(t);
+                if (t.suspended) {
+                    t.suspended = false;
+                    this.connectTerminal(t.id);
+                    return;
+                }
+                const chunks = t.pending;
+                t.pending = [];
+                t.pendingBytes = 0;
+                t.pendingOffset = null;
+                chunks.forEach((chunk) => t.term.write(chunk));
+            }
+            
+            loadRenderer(t) {
+                const renderer = t.rendererName;
+                if (!renderer || t.renderer || t.hidden || !RENDERER_SCRIPTS[renderer]) return;
+                if (!this.rendererScripts[renderer]) {
+                    this.rendererScripts[renderer] = new Promise((resolve, reject) => {
+                        const script = document.createElement('script');
+                        script.src = RENDERER_SCRIPTS[renderer];
+                        script.onload = resolve;
+                        script.onerror = reject;
+                        document.head.appendChild(script);
+                    });
+                }
+                this.rendererScripts[renderer].then(() => {
+                    if (t.renderer || t.hidden || t.closing) return;
+                    const addon = renderer === 'webgl' ? new WebglAddon.WebglAddon() : new CanvasAddon.CanvasAddon();
+                    try {
+                        t.term.loadAddon(addon);
+                    } catch (err) {
+                        console.warn('Renderer ' + renderer + ' unavailable, using DOM:', err);
+                        return;
+                    }
+                    if (addon.onContextLoss) {
+                        addon.onContextLoss(() => {
+                            addon.dispose();
+                            if (t.renderer === addon) t.renderer = null;
+                        });
+                    }
+                    t.renderer = addon;
+                }).catch((err) => console.error('Renderer:', err));
+            }
+            
+            defaultScrollback() {
+                return parseInt(localStorage.getItem('shell_matrix_scrollback'), 10) || DEFAULT_SCROLLBACK;
+            }
+            
+            copyWatchLink(id) {
+                const url = window.location.origin + window.location.pathname + '#watch=' + id;
+                navigator.clipboard.writeText(url);
+                alert(this.t('watchLinkCopied'));
+            }
+            
+            openWatchFromHash() {
+                const match = window.location.hash.match(/^#watch=([\w-]+)$/);
+                if (!match || this.terminals.has(match[1])) return;
+                this.renderTerminal({id: match[1], name: this.t('watching'), watch: true}, this.currentWorkspace);
+                this.updateCount();
+            }
+            
+            saveLiveTerminals() {
+                const live = [];
+                this.terminals.forEach((data, id) => {
+                    if (data.type === 'terminal' && !data.watch) {
+                        live.push({id, name: data.name, workspace: data.workspace, scrollback: data.scrollback,
+                                   shell: data.shell, uncreated: data.uncreated});
+                    }
                 });
+                localStorage.setItem('shell_matrix_live_terminals', JSON.stringify(live));
+            }
+            
+            restoreLiveTerminals() {
+                const saved = JSON.parse(localStorage.getItem('shell_matrix_live_terminals') || '[]');
+                if (!saved.length) return;
+                fetch('/api/terminals')
+                    .then(r => r.json())
+                    .then(alive => {
+                        const ids = new Set(alive.map(a => a.id));
+                        saved.forEach(entry => {
+                            if (!(entry.uncreated || ids.has(entry.id)) || this.terminals.has(entry.id)) return;
+                            entry.workspace = this.workspaces[entry.workspace] ? entry.workspace : 'ws1';
+                            this.addPlaceholder(entry.id, entry);
+                        });
+                        this.saveLiveTerminals();
+                        this.updateCount();
+                        this.switchWorkspace(this.currentWorkspace);
+                    })
+                    .catch(e => console.error('Erro:', e));
+            }
+            
+            decodeFrame(frame) {
+                const body = frame.subarray(1);
+                if (frame[0] === 0) return Promise.resolve(body);
+                if (frame[0] !== 1) return Promise.reject(new Error('unsupported frame ' + frame[0]));
+                const stream = new Blob([body]).stream().pipeThrough(new DecompressionStream('deflate-raw'));
+                return new Response(stream).arrayBuffer().then((buf) => new Uint8Array(buf));
             }
             
             showSearch(id) {
@@ -1941,10 +3254,15 @@ ${this.t('testProxyDesc')}`);
                 const t = this.terminals.get(id);
                 if (t) {
                     if (confirm(this.t('closeTab'))) {
+                        t.closing = true;
+                        if (t.type === 'terminal' && !t.watch && !t.uncreated) {
+                            fetch('/api/terminals/' + id, {method: 'DELETE'}).catch(e => console.error('Erro:', e));
+                        }
                         if (t.ws) t.ws.close();
                         if (t.term) t.term.dispose();
-                        t.element.remove();
+                        if (t.element) t.element.remove();
                         this.terminals.delete(id);
+                        this.saveLiveTerminals();
                         
                         const dockItem = document.getElementById('dock-' + id);
                         if (dockItem) dockItem.remove();
@@ -1959,26 +3277,439 @@ ${this.t('testProxyDesc')}`);
         
         const savedTheme = localStorage.getItem('shell_matrix_theme');
         if (savedTheme) kaliTerm.setTheme(savedTheme);
-    </script>
+"""
+
+DASHBOARD_HTML = r"""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>>_ SHELL MATRIX - N0rd</title>
+    <link rel="preload" href="{dashboard.js}" as="script">
+{vendor}
+    <link rel="stylesheet" href="{dashboard.css}">
+</head>
+<body class="theme-green">
+    <div class="header">
+        <h1>
+            <span class="prompt-blink">>_</span>
+            <span>SHELL MATRIX</span>
+            <span style="color: #666; font-size: 14px;">- N0rd</span>
+        </h1>
+        <div>
+            <select id="language-selector" class="btn" style="padding: 8px 15px; margin-right: 10px;">
+                <option value="pt">🇧🇷 Português</option>
+                <option value="en">🇺🇸 English</option>
+            </select>
+            <button id="new-tab" class="btn">+ Nova Aba (Ctrl+Shift+T)</button>
+            <button id="snippets-btn" class="btn">Snippets</button>
+            <button id="sessions-btn" class="btn">Sessoes</button>
+            <button id="settings-btn" class="btn">Config</button>
+        </div>
+    </div>
+    
+    <div id="status" class="status">
+        <div>Abas: <span id="count">0</span></div>
+        <div>WS: <span id="active-ws">WS1</span></div>
+        <div>Tema: <span id="theme-name">Verde</span></div>
+    </div>
+    
+    <div class="workspaces" id="workspaces">
+        <div class="workspace-tab active" data-ws="ws1" onclick="kaliTerm.switchWorkspace('ws1')" oncontextmenu="kaliTerm.showWorkspaceMenu(event, 'ws1'); return false;">
+            <span class="ws-name">WS1</span>
+        </div>
+        <button class="btn" id="new-ws" style="padding: 8px 12px; font-size: 12px;">+ WS</button>
+    </div>
+    
+    <div id="ws-context-menu" class="ws-context-menu">
+        <div class="ws-context-item" onclick="kaliTerm.renameWorkspace()">Renomear</div>
+        <div class="ws-context-item" onclick="kaliTerm.configProxy()">Configurar Proxy</div>
+        <div class="ws-context-item" onclick="kaliTerm.deleteWorkspace()">Deletar</div>
+        <div class="ws-context-item" onclick="kaliTerm.closeContextMenu()">Cancelar</div>
+    </div>
+    
+    <div id="workspace-area"></div>
+    <div id="dock"></div>
+
+    <div id="new-tab-modal" class="modal">
+        <div class="modal-content">
+            <h2>Nova Aba</h2>
+            <label>Nome:</label>
+            <input type="text" id="tab-name" value="Nova Aba">
+            
+            <label>Tipo:</label>
+            <select id="tab-type">
+                <option value="terminal">Terminal</option>
+                <option value="browser">Navegador</option>
+                <option value="editor">Editor de Texto</option>
+                <option value="snippet">Snippets</option>
+            </select>
+            
+            <label>Shell (apenas terminal):</label>
+            <select id="tab-shell">
+                <option value="bash">Bash</option>
+                <option value="zsh">Zsh</option>
+                <option value="fish">Fish</option>
+                <option value="sh">Sh</option>
+            </select>
+            
+            <label>Linhas de historico (apenas terminal):</label>
+            <input type="number" id="tab-scrollback" value="10000" min="0">
+            
+            <div class="modal-buttons">
+                <button class="btn" id="cancel-tab">Cancelar</button>
+                <button class="btn" id="create-tab">Criar</button>
+            </div>
+        </div>
+    </div>
+
+    <div id="proxy-modal" class="modal">
+        <div class="modal-content">
+            <h2>Configurar Proxy</h2>
+            <p style="color: var(--green); font-size: 12px; margin-bottom: 15px;">
+                Todas as ferramentas neste workspace usarao este proxy
+            </p>
+            
+            <label>Tipo:</label>
+            <select id="proxy-type">
+                <option value="http">HTTP</option>
+                <option value="https">HTTPS</option>
+                <option value="socks5">SOCKS5</option>
+            </select>
+            
+            <label>Host:</label>
+            <input type="text" id="proxy-host" placeholder="127.0.0.1">
+            
+            <label>Porta:</label>
+            <input type="number" id="proxy-port" placeholder="8080">
+            
+            <label>Usuario (opcional):</label>
+            <input type="text" id="proxy-user" placeholder="username">
+            
+            <label>Senha (opcional):</label>
+            <input type="password" id="proxy-pass" placeholder="password">
+            
+            <div style="margin: 15px 0;">
+                <button class="btn" onclick="kaliTerm.testProxy()" style="width: 100%;">Testar Proxy</button>
+            </div>
+            
+            <div class="modal-buttons">
+                <button class="btn" onclick="kaliTerm.removeProxy()">Remover Proxy</button>
+                <button class="btn" id="save-proxy">Salvar</button>
+            </div>
+        </div>
+    </div>
+
+    <div id="settings-modal" class="modal">
+        <div class="modal-content">
+            <h2>Configuracoes</h2>
+            
+            <label>Tema:</label>
+            <div class="theme-selector">
+                <div class="theme-btn green" onclick="kaliTerm.setTheme('green')"></div>
+                <div class="theme-btn red" onclick="kaliTerm.setTheme('red')"></div>
+                <div class="theme-btn blue" onclick="kaliTerm.setTheme('blue')"></div>
+                <div class="theme-btn purple" onclick="kaliTerm.setTheme('purple')"></div>
+            </div>
+            
+            <label>Auto-save Editor (segundos):</label>
+            <input type="number" id="autosave-interval" value="5" min="1">
+            
+            <label>Atalhos de Teclado:</label>
+            <div style="font-size: 12px; color: var(--green); margin: 10px 0;">
+                • Ctrl+Shift+T - Nova aba<br>
+                • Ctrl+W - Fechar aba<br>
+                • Ctrl+F - Buscar no terminal<br>
+                • Alt+1/2/3 - Trocar workspace<br>
+                • F11 - Maximizar aba<br>
+                • Clique direito no WS - Menu workspace
+            </div>
+            
+            <label>Compressao de saida (novos terminais):</label>
+            <select id="compression-setting">
+                <option value="">Nenhuma</option>
+                <option value="deflate">Deflate</option>
+            </select>
+            
+            <label>Renderizador (novos terminais):</label>
+            <select id="renderer-setting">
+                <option value="">DOM (padrao)</option>
+                <option value="canvas">Canvas</option>
+                <option value="webgl">WebGL</option>
+            </select>
+            
+            <label>Linhas de historico (padrao):</label>
+            <input type="number" id="scrollback-setting" value="10000" min="0">
+            
+            <div class="modal-buttons">
+                <button class="btn" id="close-settings">Fechar</button>
+            </div>
+        </div>
+    </div>
+
+    <div id="sessions-modal" class="modal">
+        <div class="modal-content">
+            <h2>Gerenciar Sessoes</h2>
+            
+            <label>Salvar Sessao Atual:</label>
+            <input type="text" id="session-name" placeholder="Nome da sessao">
+            <button class="btn" id="save-session" style="width: 100%; margin: 10px 0;">Salvar</button>
+            
+            <label>Sessoes Salvas:</label>
+            <div id="sessions-list" style="max-height: 300px; overflow-y: auto;">
+            </div>
+            
+            <div class="modal-buttons">
+                <button class="btn" id="close-sessions">Fechar</button>
+            </div>
+        </div>
+    </div>
+
+    <div id="snippets-panel" class="snippets-panel">
+        <h3 style="color: var(--red-main); margin-bottom: 20px;">Snippets</h3>
+        <button class="btn" style="width: 100%; margin-bottom: 10px;" id="add-snippet">+ Novo Snippet</button>
+        <div id="snippets-list"></div>
+    </div>
+
+    <script>const RENDERER_SCRIPTS = {renderers};</script>
+    <script src="{dashboard.js}"></script>
 </body>
 </html>
 """
-    return HTMLResponse(content=html)
+
+class StaticAsset:
+    """A dashboard file compressed once, served with a strong ETag per encoding."""
+    
+    def __init__(self, name, content, media_type):
+        self.body = content.encode()
+        self.media_type = media_type
+        digest = hashlib.sha256(self.body).hexdigest()[:16]
+        stem, ext = name.rsplit(".", 1)
+        self.path = f"{ASSETS_PREFIX}/{stem}.{digest[:12]}.{ext}"
+        self.encodings = {None: (self.body, f'"{digest}"')}
+        self.encodings["gzip"] = (gzip.compress(self.body, 9, mtime=0), f'"{digest}-gz"')
+        if brotli is not None:
+            self.encodings["br"] = (brotli.compress(self.body, quality=11), f'"{digest}-br"')
+    
+    def response(self, request, cache_control):
+        encoding = _pick_encoding(request.headers.get("accept-encoding", ""), self.encodings)
+        body, etag = self.encodings[encoding]
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        match = request.headers.get("if-none-match", "")
+        tags = [tag.strip().removeprefix("W/") for tag in match.split(",")]
+        if match.strip() == "*" or etag in tags:
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=self.media_type, headers=headers)
+
+def _pick_encoding(header, available):
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        try:
+            q = float(params.strip()[2:]) if params.strip().startswith("q=") else 1.0
+        except ValueError:
+            q = 1.0
+        accepted[name.strip().lower()] = q
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+def _vendor_ok(name, digest):
+    path = VENDOR_DIR / name
+    return path.exists() and digest in (None, hashlib.sha256(path.read_bytes()).hexdigest())
+
+def fetch_vendor():
+    VENDOR_DIR.mkdir(parents=True, exist_ok=True)
+    for name, url, digest in VENDOR_FILES + tuple(entry[1:] for entry in VENDOR_RENDERERS):
+        if _vendor_ok(name, digest):
+            continue
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        actual = hashlib.sha256(data).hexdigest()
+        if digest is None:
+            print(f"Warning: {name} has no pinned sha256, fetched {actual}")
+        elif actual != digest:
+            raise ValueError(f"{name} has sha256 {actual}, expected {digest}")
+        # Renamed into place so an interrupted fetch never leaves a truncated file behind
+        path = VENDOR_DIR / name
+        partial = path.with_name(name + ".part")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+        print(f"{name} <- {url}")
+
+def _vendor_bundles():
+    # The xterm.js dist files are already minified; bundling them into one
+    # script and one stylesheet saves a request per addon
+    missing = [name for name, _, digest in VENDOR_FILES if not _vendor_ok(name, digest)]
+    if missing:
+        print(f"Warning: {', '.join(missing)} missing from {VENDOR_DIR} or not matching its "
+              "sha256; loading xterm.js from the CDN (run --fetch-vendor to vendor it)")
+        return None
+    scripts, styles = [], []
+    for name, _, _ in VENDOR_FILES:
+        text = re.sub(r"^//# sourceMappingURL=.*$", "", (VENDOR_DIR / name).read_text(), flags=re.M)
+        if name.endswith(".css"):
+            text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+            styles.append(re.sub(r"\s*\n\s*", "\n", text).strip())
+        else:
+            scripts.append(text.strip())
+    return (("vendor.js", ";\n".join(scripts), "text/javascript"),
+            ("vendor.css", "\n".join(styles), "text/css"))
+
+@functools.cache
+def dashboard_assets():
+    vendor = _vendor_bundles()
+    assets = {name: StaticAsset(name, content, media_type) for name, content, media_type in (
+        ("dashboard.css", DASHBOARD_CSS, "text/css"),
+        ("dashboard.js", DASHBOARD_JS, "text/javascript"),
+        *(vendor or ()),
+    )}
+    if vendor:
+        tags = [f'    <link rel="stylesheet" href="{assets["vendor.css"].path}">',
+                f'    <script src="{assets["vendor.js"].path}"></script>']
+    else:
+        tags = [f'    <link rel="stylesheet" href="{url}">' if name.endswith(".css")
+                else f'    <script src="{url}"></script>' for name, url, _ in VENDOR_FILES]
+    renderers = {}
+    for renderer, name, url, digest in VENDOR_RENDERERS:
+        if _vendor_ok(name, digest):
+            asset = StaticAsset(name, (VENDOR_DIR / name).read_text(), "text/javascript")
+            assets[name] = asset
+            url = asset.path
+        renderers[renderer] = url
+    html = DASHBOARD_HTML.replace("{vendor}", "\n".join(tags))
+    html = html.replace("{renderers}", json.dumps(renderers))
+    for name, asset in assets.items():
+        html = html.replace("{" + name + "}", asset.path)
+    assets = {asset.path: asset for asset in assets.values()}
+    return StaticAsset("index.html", html, "text/html"), assets
+
+@app.get("/", response_class=HTMLResponse)
+async def dashboard(request: Request):
+    page, _ = dashboard_assets()
+    return page.response(request, "no-cache")
+
+if STATIC_DIR.is_dir():
+    app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+
+@app.get(ASSETS_PREFIX + "/{name}")
+async def dashboard_asset(name: str, request: Request):
+    _, assets = dashboard_assets()
+    asset = assets.get(f"{ASSETS_PREFIX}/{name}")
+    if asset is None:
+        return Response(status_code=404)
+    return asset.response(request, "public, max-age=31536000, immutable")
 
 @app.get("/debug")
 async def debug():
-    return {"status": "OK", "terminals": len(pty_manager.terminals)}
+    terminals = await asyncio.to_thread(pty_manager.list_terminals)
+    pool = await asyncio.to_thread(pty_manager.pool_sizes)
+    return {"status": "OK", "terminals": len(terminals), "pool": pool}
+
+@app.get("/metrics")
+async def metrics():
+    lines = await asyncio.to_thread(pty_manager.metrics, [process_sample("server")])
+    lines += ws_send_latency.render("shell_matrix_ws_send_seconds",
+                                    "Time to hand a frame to the WebSocket.")
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
 
 @app.post("/api/terminals")
 async def create_terminal(term: TerminalCreate):
-    terminal_id = pty_manager.create_pty(term.name, term.workspace, term.shell)
-    term_data = pty_manager.terminals[terminal_id]
+    try:
+        terminal_id = await asyncio.to_thread(pty_manager.create_pty, term.name, term.workspace,
+                                              term.shell)
+    except OSError as e:
+        return {"error": f"Could not start {term.shell}: {e}"}
+    term_data = await asyncio.to_thread(pty_manager.info, terminal_id)
     return {"id": terminal_id, "name": term_data["name"], "pid": term_data["pid"]}
 
+def _parse_byte_range(header, size):
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            return max(size - length, 0), size - 1
+        first = int(first)
+        last = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if last < first and first < size:
+        return None
+    return first, min(last, size - 1)
+
 @app.get("/api/terminals/{terminal_id}/log")
-async def get_terminal_log(terminal_id: str):
-    log = pty_manager.get_log(terminal_id)
-    return log
+async def get_terminal_log(terminal_id: str, request: Request,
+                           tail: Optional[int] = None, since: Optional[int] = None):
+    log = await asyncio.to_thread(pty_manager.get_scrollback, terminal_id)
+    if log is None:
+        return {"error": "Terminal not found"}
+    
+    snapshot = await asyncio.to_thread(log.snapshot, since or 0)
+    start, end = log.bounds(snapshot)
+    if since is not None:
+        start = max(start, min(since, end))
+    if tail is not None:
+        start = max(start, await asyncio.to_thread(log.tail_offset, snapshot, tail))
+    
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": 'attachment; filename="terminal-log.txt"',
+        "X-Log-Start": str(start),
+        "X-Log-End": str(end),
+    }
+    status_code = 200
+    range_header = request.headers.get("range")
+    # Range offsets are absolute log offsets, like since and X-Log-Start
+    byte_range = _parse_byte_range(range_header, end) if range_header else None
+    if byte_range:
+        first, last = max(byte_range[0], start), byte_range[1]
+        if first > last:
+            log.release(snapshot)
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{end}"})
+        headers["Content-Range"] = f"bytes {first}-{last}/{end}"
+        start, end = first, last + 1
+        status_code = 206
+    headers["Content-Length"] = str(end - start)
+    
+    def body():
+        # A segment that cannot be read aborts the response rather than shortening it
+        try:
+            yield from log.iter_range(snapshot, start, end)
+        finally:
+            log.release(snapshot)
+    
+    return StreamingResponse(body(), status_code=status_code, media_type="text/plain",
+                             headers=headers)
+
+@app.get("/api/terminals")
+async def list_terminals():
+    return await asyncio.to_thread(pty_manager.list_terminals)
+
+@app.delete("/api/terminals/{terminal_id}")
+async def delete_terminal(terminal_id: str):
+    if await asyncio.to_thread(pty_manager.get_scrollback, terminal_id) is None:
+        return {"error": "Terminal not found"}
+    await asyncio.to_thread(pty_manager.kill_terminal, terminal_id)
+    return {"status": "OK"}
+
+@app.post("/api/terminals/{terminal_id}/keepalive")
+async def keep_terminal_alive(terminal_id: str):
+    if not await asyncio.to_thread(pty_manager.keep_alive, terminal_id):
+        return {"error": "Terminal not found"}
+    _schedule_reap(terminal_id)
+    return {"status": "OK"}
+
+@app.get("/api/terminals/{terminal_id}/stats")
+async def get_terminal_stats(terminal_id: str):
+    stats = await asyncio.to_thread(pty_manager.get_stats, terminal_id)
+    if stats is None:
+        return {"error": "Terminal not found"}
+    return stats
 
 @app.post("/api/upload")
 async def upload_file(file: UploadFile = File(...)):
@@ -1994,32 +3725,938 @@ async def download_file(filename: str):
         return FileResponse(file_path)
     return {"error": "File not found"}
 
+def _compress_frame(data, mode):
+    start = time.perf_counter()
+    if mode == "zstd":
+        body = zstandard.ZstdCompressor(level=COMPRESS_LEVEL).compress(data)
+        flag = FRAME_ZSTD
+    else:
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+        body = compressor.compress(data) + compressor.flush()
+        flag = FRAME_DEFLATE
+    return bytes([flag]) + body, time.perf_counter() - start
+
+class FlowWindow:
+    def __init__(self, size=FLOW_WINDOW_BYTES):
+        self.size = size
+        self.sent = 0
+        self.acked = 0
+        self.opened = asyncio.Event()
+        self.opened.set()
+    
+    def available(self):
+        return self.size - (self.sent - self.acked)
+    
+    def consume(self, count):
+        self.sent += count
+        if self.available() <= 0:
+            self.opened.clear()
+    
+    def ack(self, count):
+        self.acked = max(self.acked, min(count, self.sent))
+        if self.available() > 0:
+            self.opened.set()
+
+def _schedule_reap(terminal_id):
+    # reap_detached may kill the terminal and remove its logs, so it runs in a thread
+    loop = asyncio.get_running_loop()
+    loop.call_later(DETACH_GRACE_PERIOD, loop.run_in_executor, None, pty_manager.reap_detached,
+                    terminal_id, DETACH_GRACE_PERIOD)
+
+async def _send_output(websocket: WebSocket, terminal_id: str, data: bytes,
+                       compress: Optional[str]):
+    if compress:
+        raw_size = len(data)
+        if raw_size >= COMPRESS_MIN_BYTES and compress != "raw":
+            loop = asyncio.get_running_loop()
+            data, seconds = await loop.run_in_executor(None, _compress_frame, data, compress)
+            pty_manager.record_compression(terminal_id, compress, raw_size, len(data), seconds)
+        else:
+            data = bytes([FRAME_RAW]) + data
+    start = time.perf_counter()
+    await websocket.send_bytes(data)
+    ws_send_latency.observe(time.perf_counter() - start)
+    return len(data)
+
+async def _ws_sender(websocket: WebSocket, terminal_id: str, sub: OutputSubscriber,
+                     output_ready: asyncio.Event, binary: bool, compress: Optional[str] = None,
+                     window: Optional[FlowWindow] = None):
+    loop = asyncio.get_running_loop()
+    last_flush = 0.0
+    while True:
+        await output_ready.wait()
+        output_ready.clear()
+        if window:
+            await window.opened.wait()
+        pending = pty_manager.pending_bytes(terminal_id, sub)
+        if not pending:
+            exited, code = pty_manager.exit_status(terminal_id)
+            if exited:
+                if binary:
+                    await websocket.send_text(json.dumps({"type": "exited", "code": code}))
+                await websocket.close(code=1000, reason="exited")
+                return
+            continue
+        interactive = (pending <= OUTPUT_ECHO_BYTES
+                       and loop.time() - last_flush >= OUTPUT_BATCH_DELAY)
+        if not interactive and pending < OUTPUT_BATCH_MAX_BYTES:
+            await asyncio.sleep(OUTPUT_BATCH_DELAY)
+        limit = OUTPUT_BATCH_MAX_BYTES
+        if window:
+            limit = min(limit, window.available())
+        
+        if pty_manager.lagging(terminal_id, sub):
+            output = await asyncio.to_thread(pty_manager.catch_up, terminal_id, sub, limit)
+        else:
+            output = pty_manager.read_output(terminal_id, sub, limit)
+        if window:
+            window.consume(len(output))
+        size = 0
+        if output and binary:
+            size = await _send_output(websocket, terminal_id, output, compress)
+        elif output:
+            text = sub.decoder.decode(output)
+            size = len(output)
+            if text:
+                start = time.perf_counter()
+                await websocket.send_text(text)
+                ws_send_latency.observe(time.perf_counter() - start)
+        if size:
+            pty_manager.record_frame(terminal_id, size)
+        last_flush = loop.time()
+        if pty_manager.pending_bytes(terminal_id, sub):
+            output_ready.set()
+
+def _log_tail_offset(terminal_id, lines):
+    log = pty_manager.get_scrollback(terminal_id)
+    return log.tail(lines) if log else None
+
 @app.websocket("/ws/{terminal_id}")
 async def websocket_endpoint(websocket: WebSocket, terminal_id: str):
     await websocket.accept()
+    binary = websocket.query_params.get("mode") == "binary"
+    watch = websocket.query_params.get("watch") == "1"
+    compress = websocket.query_params.get("compress")
+    if compress == "zstd" and zstandard is None:
+        compress = "deflate"
+    if not binary or compress not in ("deflate", "zstd"):
+        compress = None
+    extensions = websocket.headers.get("sec-websocket-extensions", "")
+    if compress and WS_PER_MESSAGE_DEFLATE and "permessage-deflate" in extensions:
+        # permessage-deflate already compresses this connection: keep the frame prefix
+        # the client expects, but send every frame raw instead of compressing twice
+        compress = "raw"
+    window = FlowWindow() if binary and websocket.query_params.get("flow") == "1" else None
+    try:
+        offset = websocket.query_params.get("offset")
+        offset = int(offset) if offset is not None else None
+        tail = websocket.query_params.get("tail")
+        tail = int(tail) if tail is not None else None
+    except ValueError:
+        offset = tail = None
+    if tail is not None:
+        # Replay no more than the last `tail` lines, however far behind offset is
+        start = await asyncio.to_thread(_log_tail_offset, terminal_id, tail)
+        if start is not None:
+            offset = max(offset or 0, start)
+    loop = asyncio.get_running_loop()
+    output_ready = asyncio.Event()
+    output_ready.set()
+    
+    def notify():
+        if not output_ready.is_set():
+            loop.call_soon_threadsafe(output_ready.set)
+    
+    sub = await asyncio.to_thread(pty_manager.subscribe, terminal_id, offset, watch, notify)
+    if sub is None:
+        await websocket.close(code=4404)
+        return
+    sender = None
     try:
+        if binary:
+            await websocket.send_text(json.dumps({"type": "attach", "offset": sub.cursor,
+                                                  "watch": watch}))
+        sender = asyncio.create_task(_ws_sender(websocket, terminal_id, sub, output_ready, binary,
+                                                compress, window))
         while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                if not watch:
+                    pty_manager.write_command(terminal_id, message["bytes"])
+                continue
+            data = message.get("text") or ""
             try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.05)
-                try:
-                    parsed = json.loads(data)
-                    if parsed.get("type") == "resize":
-                        pty_manager.resize_pty(terminal_id, parsed["cols"], parsed["rows"])
-                except:
+                parsed = json.loads(data)
+            except json.JSONDecodeError:
+                parsed = None
+            if not isinstance(parsed, dict):
+                if not watch:
                     pty_manager.write_command(terminal_id, data)
-            except asyncio.TimeoutError:
+                continue
+            try:
+                if parsed.get("type") == "resize" and not watch:
+                    pty_manager.resize_pty(terminal_id, int(parsed["cols"]), int(parsed["rows"]))
+                elif parsed.get("type") == "ack" and window:
+                    window.ack(int(parsed["bytes"]))
+            except (KeyError, TypeError, ValueError):
+                # Malformed control messages are dropped, never typed into the shell
+                print(f"Ignoring malformed control message for {terminal_id}: {data[:80]!r}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if sender:
+            sender.cancel()
+        pty_manager.unsubscribe(terminal_id, sub)
+        _schedule_reap(terminal_id)
+
+TERMINAL_PATH = re.compile(r"^/(?:ws|api/terminals)/([\w-]+)")
+METRIC_NAME = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+
+class TerminalRouter:
+    def __init__(self, workers):
+        self.workers = workers
+        self.owners = {}
+    
+    async def _connect(self, worker):
+        if worker.startswith("unix:"):
+            return await asyncio.open_unix_connection(worker[5:])
+        host, _, port = worker.rpartition(":")
+        return await asyncio.open_connection(host, int(port))
+    
+    async def _request(self, worker, method, path):
+        reader, writer = await self._connect(worker)
+        try:
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: shell-matrix\r\n"
+                         "Connection: close\r\n\r\n".encode())
+            response = await reader.read()
+        finally:
+            writer.close()
+        return response.partition(b"\r\n\r\n")[2]
+    
+    async def _fan_out(self, path):
+        results = await asyncio.gather(*(self._request(worker, "GET", path)
+                                         for worker in self.workers), return_exceptions=True)
+        return list(zip(self.workers, results))
+    
+    async def refresh(self):
+        terminals, owners = [], {}
+        for worker, result in await self._fan_out("/api/terminals"):
+            if isinstance(result, Exception):
+                continue
+            for term in json.loads(result):
+                owners[term["id"]] = worker
+                terminals.append(term)
+        self.owners = owners
+        return terminals
+    
+    async def debug(self):
+        terminals, pool, workers = 0, collections.Counter(), {}
+        for worker, result in await self._fan_out("/debug"):
+            try:
+                info = json.loads(result)
+                terminals += info["terminals"]
+                pool.update(info["pool"])
+                workers[worker] = True
+            except (TypeError, ValueError, KeyError):
+                workers[worker] = False
+        return {"status": "OK", "terminals": terminals, "pool": dict(pool), "workers": workers}
+    
+    async def metrics(self):
+        # Families are merged so each keeps a single HELP/TYPE header, samples gain a worker label
+        families, up = {}, []
+        for worker, result in await self._fan_out("/metrics"):
+            worker_label = f'worker="{_label(worker)}"'
+            up.append((worker_label, 0 if isinstance(result, Exception) else 1))
+            if isinstance(result, Exception):
+                continue
+            family = None
+            for line in result.decode("utf-8", errors="replace").splitlines():
+                if line.startswith("# "):
+                    family = families.setdefault(line.split(" ", 3)[2], [[], []])
+                    if line not in family[0]:
+                        family[0].append(line)
+                elif line and family is not None:
+                    match = METRIC_NAME.match(line)
+                    if not match:
+                        continue
+                    rest = line[match.end():]
+                    rest = "," + rest[1:] if rest.startswith("{") else "}" + rest
+                    family[1].append(f"{match.group()}{{{worker_label}{rest}")
+        lines = _metric("shell_matrix_worker_up", "gauge",
+                        "Whether the router could scrape the worker.", up)
+        for header, samples in families.values():
+            lines += header + samples
+        return "\n".join(lines) + "\n"
+    
+    async def owner(self, terminal_id):
+        if terminal_id not in self.owners:
+            await self.refresh()
+        return self.owners.get(terminal_id, self.workers[0])
+    
+    def pick(self):
+        counts = collections.Counter(self.owners.values())
+        return min(self.workers, key=lambda worker: counts[worker])
+    
+    async def _pipe(self, reader, writer, captured=None):
+        try:
+            while True:
+                data = await reader.read(ROUTER_CHUNK_SIZE)
+                if not data:
+                    break
+                if captured is not None:
+                    captured.extend(data)
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+    
+    async def _forward(self, worker, head, reader, writer, captured=None):
+        try:
+            upstream_reader, upstream_writer = await self._connect(worker)
+        except OSError:
+            writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n"
+                         b"Connection: close\r\n\r\n")
+            writer.close()
+            return
+        upstream_writer.write(head)
+        await asyncio.gather(self._pipe(reader, upstream_writer),
+                             self._pipe(upstream_reader, writer, captured))
+    
+    def _respond(self, writer, status, content_type, body):
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        writer.close()
+    
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        request_line, *headers = head[:-4].decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            self._respond(writer, "400 Bad Request", "text/plain", b"Bad Request")
+            return
+        path = target.split("?", 1)[0]
+        if not any(line.lower().startswith("upgrade:") for line in headers):
+            headers = [line for line in headers
+                       if line.split(":", 1)[0].strip().lower() not in ("connection", "keep-alive")]
+            headers.append("Connection: close")
+        head = "\r\n".join([request_line] + headers + ["", ""]).encode("latin-1")
+        
+        if path == "/api/terminals" and method == "GET":
+            body = json.dumps(await self.refresh()).encode()
+            self._respond(writer, "200 OK", "application/json", body)
+        elif path == "/metrics" and method == "GET":
+            body = (await self.metrics()).encode()
+            self._respond(writer, "200 OK", "text/plain; version=0.0.4", body)
+        elif path == "/debug" and method == "GET":
+            body = json.dumps(await self.debug()).encode()
+            self._respond(writer, "200 OK", "application/json", body)
+        elif path == "/api/terminals" and method == "POST":
+            worker = self.pick()
+            response = bytearray()
+            await self._forward(worker, head, reader, writer, response)
+            try:
+                self.owners[json.loads(response.partition(b"\r\n\r\n")[2])["id"]] = worker
+            except (ValueError, KeyError, TypeError):
                 pass
+        else:
+            match = TERMINAL_PATH.match(path)
+            worker = await self.owner(match.group(1)) if match else self.workers[0]
+            await self._forward(worker, head, reader, writer)
+            if match and method == "DELETE":
+                self.owners.pop(match.group(1), None)
+
+def start_workers(count):
+    WORKERS_DIR.mkdir(exist_ok=True)
+    processes, workers = [], []
+    for index in range(count):
+        path = WORKERS_DIR / f"{os.getpid()}-{index}.sock"
+        processes.append(subprocess.Popen([sys.executable, os.path.abspath(__file__),
+                                           "--uds", str(path)]))
+        workers.append(f"unix:{path}")
+    deadline = time.monotonic() + WORKER_START_TIMEOUT
+    while time.monotonic() < deadline and not all(Path(w[5:]).exists() for w in workers):
+        time.sleep(0.05)
+    return processes, workers
+
+async def serve_router(workers, host, port):
+    router = TerminalRouter(workers)
+    server = await asyncio.start_server(router.handle, host, port, limit=ROUTER_CHUNK_SIZE)
+    async with server:
+        await server.serve_forever()
+
+class RemoteSubscriber(OutputSubscriber):
+    __slots__ = ("id", "terminal_id", "chunks", "pending", "consumed")
+    
+    def __init__(self, sub_id, terminal_id, watch=False, notify=None):
+        super().__init__(0, watch, notify)
+        self.id = sub_id
+        self.terminal_id = terminal_id
+        self.chunks = collections.deque()
+        self.pending = 0
+        self.consumed = 0
+
+class RemoteLog:
+    def __init__(self, manager, terminal_id):
+        self.manager = manager
+        self.terminal_id = terminal_id
+    
+    def snapshot(self, start=0):
+        return tuple(self.manager._call("log_bounds", self.terminal_id) or (0, 0))
+    
+    def release(self, snapshot):
+        pass
+    
+    def bounds(self, snapshot):
+        return snapshot
+    
+    def tail_offset(self, snapshot, lines):
+        return self.manager._call("log_tail", self.terminal_id, lines)
+    
+    def tail(self, lines):
+        return self.tail_offset(None, lines)
+    
+    def iter_range(self, snapshot, start, end, chunk_size=65536):
+        return self.manager.read_log(self.terminal_id, start, end)
+
+class RemotePTYManager:
+    """PTYManager stand-in that forwards to a PTY daemon over its Unix socket."""
+    
+    def __init__(self, path=PTY_DAEMON_SOCKET):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._calls = {}
+        self._next_id = 0
+        self._subs = {}
+        self._streams = {}
+        self._exited = {}
+        self._stats = {}
+        self._stats_flushed = time.monotonic()
+        self.sock = None
+        self._connect()
+    
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        self.sock = sock
+        threading.Thread(target=self._read_loop, args=(sock,), name="ptyd-reader",
+                         daemon=True).start()
+    
+    def _send(self, kind, payload):
+        with self._send_lock:
+            if self.sock is None:
+                self._connect()
+            self.sock.sendall(struct.pack("!BI", kind, len(payload)) + payload)
+    
+    def _call(self, method, *args, reply=True):
+        call_id = 0
+        if reply:
+            with self.lock:
+                self._next_id += 1
+                call_id = self._next_id
+                waiter = self._calls[call_id] = [threading.Event(), None]
+        self._send(MSG_CALL, json.dumps({"id": call_id, "method": method, "args": args}).encode())
+        if not reply:
+            return None
+        if not waiter[0].wait(PTY_DAEMON_CALL_TIMEOUT):
+            self._calls.pop(call_id, None)
+            raise TimeoutError(f"PTY daemon did not answer {method}")
+        if "error" in waiter[1]:
+            raise OSError(waiter[1]["error"])
+        return waiter[1]["result"]
+    
+    def _read_loop(self, sock):
+        stream = sock.makefile("rb")
+        while True:
+            header = stream.read(5)
+            if len(header) < 5:
+                break
+            kind, length = struct.unpack("!BI", header)
+            payload = stream.read(length)
+            if kind == MSG_REPLY:
+                message = json.loads(payload)
+                waiter = self._calls.pop(message["id"], None)
+                if waiter:
+                    waiter[1] = message
+                    waiter[0].set()
+                elif message["id"] in self._streams:
+                    self._streams[message["id"]].put(message)
+            elif kind == MSG_LOG:
+                chunks = self._streams.get(struct.unpack_from("!I", payload)[0])
+                if chunks:
+                    chunks.put(payload[4:])
+            elif kind == MSG_OUTPUT:
+                sub_id, offset = struct.unpack_from("!IQ", payload)
+                sub = self._subs.get(sub_id)
+                if sub:
+                    with self.lock:
+                        sub.chunks.append((offset, payload[12:]))
+                        sub.pending += length - 12
+                    if sub.notify:
+                        sub.notify()
+            elif kind == MSG_EXIT:
+                message = json.loads(payload)
+                sub = self._subs.get(message["sub"])
+                if sub:
+                    self._exited[sub.terminal_id] = message["code"]
+                    if sub.notify:
+                        sub.notify()
+        with self._send_lock:
+            if self.sock is sock:
+                self.sock = None
+        sock.close()
+        for chunks in list(self._streams.values()):
+            chunks.put({"error": "PTY daemon connection lost"})
+        for sub in list(self._subs.values()):
+            self._exited[sub.terminal_id] = None
+            if sub.notify:
+                sub.notify()
+    
+    def create_pty(self, name="Terminal", workspace="ws1", shell="bash"):
+        return self._call("create_pty", name, workspace, shell)
+    
+    def warm_pool(self, *shells):
+        self._call("warm_pool", *shells, reply=False)
+    
+    def pool_sizes(self):
+        return self._call("pool_sizes")
+    
+    def list_terminals(self):
+        return self._call("list_terminals")
+    
+    def info(self, terminal_id):
+        return self._call("info", terminal_id)
+    
+    def subscribe(self, terminal_id, offset=None, watch=False, notify=None):
+        with self.lock:
+            self._next_id += 1
+            sub = RemoteSubscriber(self._next_id, terminal_id, watch, notify)
+        self._subs[sub.id] = sub
+        cursor = self._call("subscribe", sub.id, terminal_id, offset, watch)
+        if cursor is None:
+            self._subs.pop(sub.id, None)
+            return None
+        sub.cursor = cursor
+        return sub
+    
+    def unsubscribe(self, terminal_id, sub):
+        self.flush_stats()
+        self._subs.pop(sub.id, None)
+        if not any(other.terminal_id == terminal_id for other in list(self._subs.values())):
+            self._exited.pop(terminal_id, None)
+        try:
+            self._call("unsubscribe", sub.id, reply=False)
+        except OSError:
+            pass
+    
+    def reap_detached(self, terminal_id, grace=DETACH_GRACE_PERIOD):
+        try:
+            self._call("reap_detached", terminal_id, grace, reply=False)
+        except OSError:
+            pass
+    
+    def keep_alive(self, terminal_id):
+        return self._call("keep_alive", terminal_id)
+    
+    def write_command(self, terminal_id, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8', errors='replace')
+        key = terminal_id.encode()
+        try:
+            self._send(MSG_INPUT, bytes([len(key)]) + key + data)
+        except OSError:
+            return False
+        return True
+    
+    def read_output(self, terminal_id, sub, limit=None):
+        parts, size = [], 0
+        with self.lock:
+            while sub.chunks and (limit is None or size < limit):
+                offset, data = sub.chunks[0]
+                take = len(data) if limit is None else min(len(data), limit - size)
+                if take == len(data):
+                    sub.chunks.popleft()
+                else:
+                    sub.chunks[0] = (offset + take, data[take:])
+                parts.append(data[:take])
+                size += take
+                sub.cursor = offset + take
+            sub.pending -= size
+            sub.consumed += size
+        if size:
+            try:
+                self._send(MSG_ACK, struct.pack("!IQ", sub.id, sub.consumed))
+            except OSError:
+                pass
+        return b"".join(parts)
+    
+    def read_output_text(self, terminal_id, sub, limit=None):
+        return sub.decoder.decode(self.read_output(terminal_id, sub, limit))
+    
+    def catch_up(self, terminal_id, sub, limit):
+        return self.read_output(terminal_id, sub, limit)
+    
+    def lagging(self, terminal_id, sub):
+        return False
+    
+    def pending_bytes(self, terminal_id, sub):
+        return sub.pending
+    
+    def exit_status(self, terminal_id):
+        if terminal_id in self._exited:
+            return True, self._exited[terminal_id]
+        return False, None
+    
+    def record_frame(self, terminal_id, size):
+        # Counted here and sent to the daemon in batches instead of a call per frame
+        with self.lock:
+            stats = self._stats.setdefault(terminal_id, [0, 0, None, 0, 0, 0.0])
+            stats[0] += 1
+            stats[1] += size
+        if time.monotonic() - self._stats_flushed >= PTY_DAEMON_STATS_INTERVAL:
+            self.flush_stats()
+    
+    def record_compression(self, terminal_id, mode, raw_size, compressed_size, seconds):
+        with self.lock:
+            stats = self._stats.setdefault(terminal_id, [0, 0, None, 0, 0, 0.0])
+            stats[2] = mode
+            stats[3] += raw_size
+            stats[4] += compressed_size
+            stats[5] += seconds
+    
+    def flush_stats(self):
+        with self.lock:
+            batch, self._stats = self._stats, {}
+            self._stats_flushed = time.monotonic()
+        try:
+            for terminal_id, (frames, size, mode, raw, compressed, seconds) in batch.items():
+                if frames:
+                    self._call("record_frame", terminal_id, size, frames, reply=False)
+                if mode:
+                    self._call("record_compression", terminal_id, mode, raw, compressed, seconds,
+                               reply=False)
+        except OSError:
+            pass
+    
+    def get_stats(self, terminal_id):
+        self.flush_stats()
+        return self._call("get_stats", terminal_id)
+    
+    def resize_pty(self, terminal_id, cols, rows):
+        self._call("resize_pty", terminal_id, cols, rows, reply=False)
+    
+    def get_scrollback(self, terminal_id):
+        if self._call("log_bounds", terminal_id) is None:
+            return None
+        return RemoteLog(self, terminal_id)
+    
+    def read_log(self, terminal_id, start, end):
+        # The daemon answers with raw MSG_LOG frames from one pinned snapshot and closes the
+        # stream with its reply; acks pace it like terminal output
+        with self.lock:
+            self._next_id += 1
+            call_id = self._next_id
+            stream = self._streams[call_id] = queue.Queue()
+        done, received = False, 0
+        try:
+            self._send(MSG_CALL, json.dumps({"id": call_id, "method": "log_read",
+                                             "args": [terminal_id, start, end]}).encode())
+            while True:
+                try:
+                    item = stream.get(timeout=PTY_DAEMON_CALL_TIMEOUT)
+                except queue.Empty:
+                    raise TimeoutError("PTY daemon stopped sending log_read") from None
+                if isinstance(item, dict):
+                    done = True
+                    if "error" in item:
+                        raise OSError(item["error"])
+                    return
+                received += len(item)
+                self._send(MSG_ACK, struct.pack("!IQ", call_id, received))
+                yield item
+        finally:
+            self._streams.pop(call_id, None)
+            if not done:
+                with contextlib.suppress(OSError):
+                    self._call("log_close", call_id, reply=False)
+    
+    def get_log(self, terminal_id):
+        log = self.get_scrollback(terminal_id)
+        if log is None:
+            return ""
+        snapshot = log.snapshot()
+        return b"".join(log.iter_range(snapshot, *snapshot)).decode('utf-8', errors='replace')
+    
+    def metrics(self, processes=()):
+        self.flush_stats()
+        return self._call("metrics", list(processes))
+    
+    def kill_terminal(self, terminal_id):
+        self._call("kill_terminal", terminal_id)
+
+class PTYDaemon:
+    """Serves a PTYManager to RemotePTYManager gateways over a Unix socket."""
+    
+    METHODS = ("list_terminals", "info", "kill_terminal", "resize_pty", "get_stats",
+               "reap_detached", "keep_alive", "record_frame", "record_compression", "pool_sizes", "warm_pool")
+    
+    def __init__(self, manager):
+        self.manager = manager
+    
+    async def handle(self, reader, writer):
+        subs = {}
+        streams = {}
+        
+        def send(kind, payload):
+            writer.write(struct.pack("!BI", kind, len(payload)) + payload)
+        
+        try:
+            while True:
+                kind, length = struct.unpack("!BI", await reader.readexactly(5))
+                payload = await reader.readexactly(length)
+                if kind == MSG_INPUT:
+                    size = payload[0]
+                    self.manager.write_command(payload[1:1 + size].decode(), payload[1 + size:])
+                elif kind == MSG_ACK:
+                    sub_id, acked = struct.unpack("!IQ", payload)
+                    if sub_id in subs:
+                        subs[sub_id][3].ack(acked)
+                    elif sub_id in streams:
+                        streams[sub_id][0].ack(acked)
+                elif kind == MSG_CALL:
+                    message = json.loads(payload)
+                    if message["method"] == "log_read":
+                        stream = streams[message["id"]] = [FlowWindow(), None]
+                        stream[1] = asyncio.create_task(
+                            self._stream_log(send, writer, streams, message["id"], *message["args"]))
+                        continue
+                    if message["method"] == "log_close":
+                        stream = streams.pop(message["args"][0], None)
+                        if stream:
+                            stream[1].cancel()
+                        continue
+                    try:
+                        result = await self._dispatch(message["method"], message["args"], subs)
+                        reply = {"id": message["id"], "result": result}
+                    except Exception as e:
+                        reply = {"id": message["id"], "error": str(e)}
+                    if message["id"]:
+                        send(MSG_REPLY, json.dumps(reply).encode())
+                    if message["method"] == "subscribe" and reply.get("result") is not None:
+                        sub_id = message["args"][0]
+                        subs[sub_id][2] = asyncio.create_task(
+                            self._sender(send, writer, sub_id, *subs[sub_id]))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for sub_id in list(subs):
+                self._unsubscribe(subs, sub_id)
+            for window, task in streams.values():
+                task.cancel()
+            writer.close()
+    
+    async def _dispatch(self, method, args, subs):
+        manager = self.manager
+        if method in self.METHODS:
+            # Off the loop: kill_terminal removes log directories and must not stall output
+            return await asyncio.to_thread(getattr(manager, method), *args)
+        if method == "create_pty":
+            return await asyncio.to_thread(manager.create_pty, *args)
+        if method == "metrics":
+            return await asyncio.to_thread(manager.metrics, args[0] + [process_sample("daemon")])
+        if method == "subscribe":
+            sub_id, terminal_id, offset, watch = args
+            loop = asyncio.get_running_loop()
+            ready = asyncio.Event()
+            ready.set()
             
-            output = pty_manager.get_output(terminal_id)
-            if output:
-                await websocket.send_text(output)
+            def notify():
+                if not ready.is_set():
+                    loop.call_soon_threadsafe(ready.set)
             
-            await asyncio.sleep(0.01)
-    except WebSocketDisconnect:
-        pty_manager.kill_terminal(terminal_id)
+            sub = manager.subscribe(terminal_id, offset, watch, notify)
+            if sub is None:
+                return None
+            subs[sub_id] = [terminal_id, sub, None, FlowWindow(), ready]
+            return sub.cursor
+        if method == "unsubscribe":
+            self._unsubscribe(subs, args[0])
+            return None
+        log = manager.get_scrollback(args[0])
+        if log is None:
+            return None
+        if method == "log_bounds":
+            with log.lock:
+                return [log.start, log.end]
+        if method == "log_tail":
+            return await asyncio.to_thread(log.tail, args[1])
+        raise ValueError(f"unknown method {method}")
+    
+    def _unsubscribe(self, subs, sub_id):
+        entry = subs.pop(sub_id, None)
+        if not entry:
+            return
+        terminal_id, sub, task = entry[:3]
+        if task:
+            task.cancel()
+        self.manager.unsubscribe(terminal_id, sub)
+        loop = asyncio.get_running_loop()
+        loop.call_later(DETACH_GRACE_PERIOD, loop.run_in_executor, None,
+                        self.manager.reap_detached, terminal_id)
+    
+    async def _stream_log(self, send, writer, streams, call_id, terminal_id, start, end):
+        window = streams[call_id][0]
+        log = self.manager.get_scrollback(terminal_id)
+        sent = 0
+        try:
+            if log is None:
+                raise ValueError("Terminal not found")
+            snapshot = await asyncio.to_thread(log.snapshot, start)
+            chunks = log.iter_range(snapshot, start, end)
+            lock = threading.Lock()
+            
+            def step():
+                with lock:
+                    return next(chunks, None)
+            
+            def finish():
+                # Waits out a read still running in a worker thread after a cancel
+                with lock:
+                    chunks.close()
+                    log.release(snapshot)
+            
+            try:
+                while True:
+                    await window.opened.wait()
+                    data = await asyncio.to_thread(step)
+                    if data is None:
+                        break
+                    window.consume(len(data))
+                    send(MSG_LOG, struct.pack("!I", call_id) + data)
+                    sent += len(data)
+                    await writer.drain()
+            finally:
+                asyncio.get_running_loop().run_in_executor(None, finish)
+            reply = {"id": call_id, "result": sent}
+        except Exception as e:
+            reply = {"id": call_id, "error": str(e)}
+        finally:
+            streams.pop(call_id, None)
+        send(MSG_REPLY, json.dumps(reply).encode())
+    
+    async def _sender(self, send, writer, sub_id, terminal_id, sub, task, window, ready):
+        manager = self.manager
+        while True:
+            await ready.wait()
+            ready.clear()
+            await window.opened.wait()
+            if not manager.pending_bytes(terminal_id, sub):
+                exited, code = manager.exit_status(terminal_id)
+                if exited:
+                    send(MSG_EXIT, json.dumps({"sub": sub_id, "code": code}).encode())
+                    return
+                continue
+            limit = min(OUTPUT_BATCH_MAX_BYTES, window.available())
+            if manager.lagging(terminal_id, sub):
+                output = await asyncio.to_thread(manager.catch_up, terminal_id, sub, limit)
+            else:
+                output = manager.read_output(terminal_id, sub, limit)
+            if output:
+                window.consume(len(output))
+                send(MSG_OUTPUT, struct.pack("!IQ", sub_id, sub.cursor - len(output)) + output)
+                await writer.drain()
+            if manager.pending_bytes(terminal_id, sub):
+                ready.set()
+
+async def serve_pty_daemon(path):
+    pty_manager.warm_pool(*SHELL_POOL_WARM)
+    Path(path).unlink(missing_ok=True)
+    server = await asyncio.start_unix_server(PTYDaemon(pty_manager).handle, str(path))
+    async with server:
+        await server.serve_forever()
+
+def connect_pty_daemon(path):
+    try:
+        return RemotePTYManager(path)
+    except OSError:
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--pty-daemon",
+                          "--socket", str(path)], start_new_session=True,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + WORKER_START_TIMEOUT
+    while True:
+        try:
+            return RemotePTYManager(path)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shell Matrix")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--uds", help="serve on a Unix socket (used for router workers)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="local worker processes; more than one starts the terminal router")
+    parser.add_argument("--peer", action="append", default=[], metavar="HOST:PORT",
+                        help="remote shell_matrix instance that owns terminals (repeatable)")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep terminals in a separate PTY daemon so restarts do not "
+                             "kill shells")
+    parser.add_argument("--pty-daemon", action="store_true", help="run the PTY daemon itself")
+    parser.add_argument("--socket", default=str(PTY_DAEMON_SOCKET), help="PTY daemon socket path")
+    parser.add_argument("--fetch-vendor", action="store_true",
+                        help=f"download xterm.js into {VENDOR_DIR} so the dashboard works offline")
+    args = parser.parse_args()
+    if args.daemon and (args.workers > 1 or args.peer):
+        # Workers each own their terminals; one shared daemon would hand all of them to every worker
+        parser.error("--daemon cannot be combined with --workers or --peer")
+    
+    if args.fetch_vendor:
+        try:
+            fetch_vendor()
+        except (OSError, ValueError) as e:
+            sys.exit(f"--fetch-vendor failed: {e}")
+        sys.exit(0)
+    if args.pty_daemon:
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        asyncio.run(serve_pty_daemon(args.socket))
+        sys.exit(0)
+    if args.daemon:
+        pty_manager = connect_pty_daemon(args.socket)
+    
+    if args.uds:
+        uvicorn.run(app, uds=args.uds, ws_per_message_deflate=WS_PER_MESSAGE_DEFLATE,
+                    log_level="warning")
+        sys.exit(0)
+    
     print(">_ SHELL MATRIX - N0rd")
-    print("Acesse: http://localhost:8000")
+    print(f"Acesse: http://localhost:{args.port}")
     print("")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if args.workers <= 1 and not args.peer:
+        uvicorn.run(app, host=args.host, port=args.port,
+                    ws_per_message_deflate=WS_PER_MESSAGE_DEFLATE)
+        sys.exit(0)
+    
+    processes, workers = start_workers(max(args.workers, 0))
+    print(f"Router: {len(workers)} local worker(s), {len(args.peer)} peer(s)")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(serve_router(workers + args.peer, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for worker in workers:
+            Path(worker[5:]).unlink(missing_ok=True)